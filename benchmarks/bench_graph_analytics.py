@@ -0,0 +1,79 @@
+# benchmarks/bench_graph_analytics.py
+"""Benchmark run_graph_analytics on a synthetic power-law edge graph.
+
+    python benchmarks/bench_graph_analytics.py --edges 10000000 --output analytics.json
+"""
+
+import argparse
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from common import create_database, emit_results, timed
+
+RELATIONSHIP_TYPES = ['RELATED_TO', 'PART_OF', 'SIMILAR_CONTENT', 'SHARED_TAGS']
+
+def synthetic_edges(num_nodes: int, num_edges: int, seed: int, batch_size: int = 100000):
+    """Yield (source, target, type, strength) rows with Zipf-distributed targets."""
+    rng = np.random.default_rng(seed)
+    for offset in range(0, num_edges, batch_size):
+        size = min(batch_size, num_edges - offset)
+        sources = rng.integers(0, num_nodes, size)
+        targets = (rng.zipf(1.3, size) - 1) % num_nodes
+        types = rng.integers(0, len(RELATIONSHIP_TYPES), size)
+        strengths = rng.random(size)
+        for i in range(size):
+            yield (f"n{sources[i]}", f"n{targets[i]}", RELATIONSHIP_TYPES[types[i]], float(strengths[i]))
+
+def insert_edges(path: Path, rows) -> int:
+    conn = sqlite3.connect(path)
+    # Duplicate (source, target, type) draws are dropped by the partial unique
+    # index idx_edges_open, which covers them because end_time is left NULL
+    conn.executemany('''
+        INSERT OR IGNORE INTO edges (source_id, target_id, relationship_type, strength)
+        VALUES (?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+    count = conn.execute('SELECT COUNT(*) FROM edges').fetchone()[0]
+    conn.close()
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--edges', type=int, default=10_000_000)
+    parser.add_argument('--nodes', type=int, default=None, help="defaults to edges / 10")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+    num_nodes = args.nodes or max(args.edges // 10, 1)
+
+    from kb_graph import graph_operations
+    from kb_graph.analytics import run_graph_analytics, get_node_importance
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        graph_operations.DB_PATH = Path(tmp) / 'bench.db'
+        create_database(graph_operations.DB_PATH).close()
+        with timed(results, 'insert_edges', edges=args.edges, nodes=num_nodes) as result:
+            result["stored_edges"] = insert_edges(graph_operations.DB_PATH,
+                                                  synthetic_edges(num_nodes, args.edges, args.seed))
+
+        with timed(results, 'analytics_full', edges=args.edges) as result:
+            result["summary"] = run_graph_analytics()
+        with timed(results, 'analytics_unchanged', edges=args.edges) as result:
+            result["summary"] = run_graph_analytics()
+
+        new_edges = max(args.edges // 1000, 1)
+        insert_edges(graph_operations.DB_PATH, synthetic_edges(num_nodes, new_edges, args.seed + 1))
+        with timed(results, 'analytics_incremental', edges=args.edges, new_edges=new_edges) as result:
+            result["summary"] = run_graph_analytics()
+
+        node_ids = [f"n{i}" for i in range(min(num_nodes, 1000))]
+        with timed(results, 'node_importance_lookup', nodes=len(node_ids)) as result:
+            result["found"] = len(get_node_importance(node_ids))
+
+    emit_results('graph_analytics', results, args.output)
+
+if __name__ == '__main__':
+    main()
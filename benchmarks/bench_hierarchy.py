@@ -0,0 +1,108 @@
+# benchmarks/bench_hierarchy.py
+"""Benchmark hierarchy bulk loading and closure-table lookups on synthetic taxonomies.
+
+Lookups are compared with a level-by-level walk over the hierarchies table,
+which is what ancestor/descendant queries cost without the closure.
+
+    python benchmarks/bench_hierarchy.py --output hierarchy.json
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from common import create_database, emit_results, latency_summary, timed
+
+def chain(depth: int):
+    return [(f"d{i}", f"d{i + 1}") for i in range(depth)]
+
+def star(width: int):
+    return [("root", f"w{i}") for i in range(width)]
+
+def balanced(branching: int, depth: int):
+    pairs, level = [], ["b"]
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for i in range(branching):
+                child = f"{parent}.{i}"
+                pairs.append((parent, child))
+                next_level.append(child)
+        level = next_level
+    return pairs
+
+def walk(column: str, key_column: str, node_id: str, hierarchy_type: str):
+    """Baseline: one round trip per level of the hierarchies table."""
+    from kb_graph.graph_operations import get_db_connection
+    found, frontier = [], [node_id]
+    with get_db_connection() as conn:
+        while frontier:
+            placeholders = ','.join('?' * len(frontier))
+            frontier = [row[0] for row in conn.execute(f'''
+                SELECT {column} FROM hierarchies
+                WHERE hierarchy_type = ? AND {key_column} IN ({placeholders})
+            ''', [hierarchy_type] + frontier)]
+            found.extend(frontier)
+    return found
+
+def measure(fn, nodes, repeat: int):
+    samples = []
+    for node_id in nodes[:repeat]:
+        started = time.perf_counter()
+        fn(node_id)
+        samples.append(time.perf_counter() - started)
+    return latency_summary(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--depth', type=int, default=1000, help="length of the deep chain")
+    parser.add_argument('--width', type=int, default=100000, help="children of the wide root")
+    parser.add_argument('--branching', type=int, default=10)
+    parser.add_argument('--levels', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    from kb_graph import graph_operations
+    from kb_graph.hierarchy import add_hierarchy_bulk, ancestors, descendants, subtree
+    rng = random.Random(args.seed)
+    taxonomies = {
+        'deep': chain(args.depth),
+        'wide': star(args.width),
+        'balanced': balanced(args.branching, args.levels),
+    }
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        graph_operations.DB_PATH = Path(tmp) / 'bench.db'
+        conn = create_database(graph_operations.DB_PATH)
+        for name, pairs in taxonomies.items():
+            shuffled = pairs[:]
+            rng.shuffle(shuffled)
+            with timed(results, f'{name}_bulk_insert', edges=len(pairs)) as result:
+                add_hierarchy_bulk(shuffled, name)
+            result["closure_rows"] = conn.execute(
+                'SELECT COUNT(*) FROM hierarchy_closure WHERE hierarchy_type = ?', (name,)).fetchone()[0]
+
+            parents = sorted({parent for parent, _ in pairs})
+            children = sorted({child for _, child in pairs})
+            rng.shuffle(parents)
+            rng.shuffle(children)
+            lookups = {
+                'ancestors': (lambda n: ancestors(n, name), children),
+                'ancestors_walk': (lambda n: walk('parent_id', 'child_id', n, name), children),
+                'descendants': (lambda n: descendants(n, name), parents),
+                'descendants_walk': (lambda n: walk('child_id', 'parent_id', n, name), parents),
+                'subtree': (lambda n: subtree(n, name), parents),
+            }
+            for lookup, (fn, nodes) in lookups.items():
+                with timed(results, f'{name}_{lookup}', queries=min(args.queries, len(nodes))) as result:
+                    result["latency"] = measure(fn, nodes, args.queries)
+        conn.close()
+
+    emit_results('hierarchy', results, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_temporal_edges.py
+"""Benchmark current, as-of and time-window edge queries on a graph with dense edge history.
+
+Every edge gets --versions consecutive validity intervals. The baseline is the
+two-branch UNION query get_related_nodes used before edges were versioned,
+with a validity filter added.
+
+    python benchmarks/bench_temporal_edges.py --output temporal.json
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from common import create_database, emit_results, latency_summary, timed
+
+START = datetime(2020, 1, 1)
+
+def versioned_edges(num_nodes: int, degree: int, versions: int, seed: int):
+    """Yield edge rows; each (source, target, type) has `versions` back-to-back intervals."""
+    rng = random.Random(seed)
+    for source in range(num_nodes):
+        for target in rng.sample(range(num_nodes), degree):
+            bidirectional = rng.random() < 0.5
+            moment = START + timedelta(hours=rng.randrange(48))
+            for version in range(versions):
+                end = moment + timedelta(days=rng.randrange(1, 20))
+                yield (f"n{source}", f"n{target}", "RELATED_TO", rng.random(), int(bidirectional),
+                       moment.strftime('%Y-%m-%d %H:%M:%S.%f'),
+                       None if version == versions - 1 else end.strftime('%Y-%m-%d %H:%M:%S.%f'))
+                moment = end
+
+def union_baseline(node_id: str, as_of: str):
+    from kb_graph.graph_operations import get_db_connection
+    with get_db_connection() as conn:
+        return conn.execute('''
+            SELECT target_id, relationship_type, strength
+            FROM edges
+            WHERE source_id = ? AND start_time <= ? AND (end_time IS NULL OR end_time > ?)
+            UNION
+            SELECT source_id, relationship_type, strength
+            FROM edges
+            WHERE target_id = ? AND start_time <= ? AND (end_time IS NULL OR end_time > ?)
+        ''', (node_id, as_of, as_of, node_id, as_of, as_of)).fetchall()
+
+def measure(fn, node_ids):
+    samples = []
+    for node_id in node_ids:
+        started = time.perf_counter()
+        fn(node_id)
+        samples.append(time.perf_counter() - started)
+    return latency_summary(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nodes', type=int, default=5000)
+    parser.add_argument('--degree', type=int, default=10)
+    parser.add_argument('--versions', type=int, default=50)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    from kb_graph import graph_operations
+    from kb_graph.graph_operations import get_related_nodes, get_edges_in_window, _touching_edges_sql
+    rng = random.Random(args.seed)
+    node_ids = [f"n{rng.randrange(args.nodes)}" for _ in range(args.queries)]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        graph_operations.DB_PATH = Path(tmp) / 'bench.db'
+        conn = create_database(graph_operations.DB_PATH)
+        with timed(results, 'insert_versions', nodes=args.nodes, degree=args.degree,
+                   versions=args.versions) as result:
+            conn.executemany('''
+                INSERT INTO edges (source_id, target_id, relationship_type, strength, bidirectional, start_time, end_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', versioned_edges(args.nodes, args.degree, args.versions, args.seed))
+            conn.commit()
+            result["rows"] = conn.execute('SELECT COUNT(*) FROM edges').fetchone()[0]
+        result["as_of_plan"] = [row[3] for row in conn.execute(
+            'EXPLAIN QUERY PLAN ' + _touching_edges_sql('1', True),
+            {'node_id': 'n0', 'valid_from': '', 'valid_to': ''})]
+
+        last_end = conn.execute('SELECT MAX(end_time) FROM edges').fetchone()[0]
+        recent = (datetime.fromisoformat(last_end) - timedelta(days=30)).strftime('%Y-%m-%d %H:%M:%S.%f')
+        early = (START + timedelta(days=30)).strftime('%Y-%m-%d %H:%M:%S.%f')
+        scenarios = {
+            'current': lambda n: get_related_nodes(n),
+            'as_of_recent': lambda n: get_related_nodes(n, as_of=recent),
+            'as_of_recent_union_baseline': lambda n: union_baseline(n, recent),
+            'as_of_early': lambda n: get_related_nodes(n, as_of=early),
+            'as_of_early_union_baseline': lambda n: union_baseline(n, early),
+            'window_30_days': lambda n: get_edges_in_window(n, recent, last_end),
+        }
+        for name, fn in scenarios.items():
+            with timed(results, name, queries=len(node_ids)) as result:
+                result["latency"] = measure(fn, node_ids)
+        conn.close()
+
+    emit_results('temporal_edges', results, args.output)
+
+if __name__ == '__main__':
+    main()
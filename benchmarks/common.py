@@ -0,0 +1,79 @@
+# benchmarks/common.py
+
+import json
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+# Benchmarks run against the checkout, importing packages the way setup.py installs them
+sys.path.insert(0, str(ROOT / 'src'))
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+def create_database(path: Path) -> sqlite3.Connection:
+    from kb_graph.schema import SCHEMA
+    path.unlink(missing_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+@contextmanager
+def timed(results: List[Dict[str, Any]], name: str, **params):
+    started = time.perf_counter()
+    result = {"name": name, "params": params}
+    yield result
+    result["seconds"] = time.perf_counter() - started
+    results.append(result)
+    print(f"{name}: {result['seconds']:.3f}s {params}", file=sys.stderr)
+
+@contextmanager
+def scenario(results: List[Dict[str, Any]], name: str, **params):
+    """Like timed, but a failing scenario is recorded with status 'error'
+    instead of aborting the whole run."""
+    started = time.perf_counter()
+    result = {"name": name, "params": params, "status": "ok"}
+    try:
+        yield result
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - started
+    results.append(result)
+    print(f"{name}: {result['status']} {result['seconds']:.3f}s {result.get('error', '')}", file=sys.stderr)
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "mean_ms": 1000 * sum(samples) / len(samples),
+        "p50_ms": 1000 * samples[len(samples) // 2],
+        "p95_ms": 1000 * samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "max_ms": 1000 * samples[-1],
+    }
+
+def emit_results(suite: str, results: List[Dict[str, Any]], output: str = None) -> None:
+    report = {
+        "suite": suite,
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if output:
+        Path(output).write_text(text)
+    else:
+        print(text)
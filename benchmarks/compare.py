@@ -0,0 +1,65 @@
+# benchmarks/compare.py
+"""Compare two benchmark result files and flag regressions.
+
+Scenarios are matched by suite and name and compared on p50 latency when
+recorded, otherwise on total seconds. Exits with status 1 if any scenario got
+slower than the threshold allows or failed, even if it also failed in the
+baseline.
+
+    python benchmarks/compare.py baseline.json results.json --threshold 0.2
+"""
+
+import argparse
+import json
+import sys
+
+def metric(result):
+    if result.get("status", "ok") != "ok":
+        return None
+    if "latency" in result:
+        return result["latency"]["p50_ms"] / 1000
+    return result.get("seconds")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown, as a fraction")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline["suite"] != current["suite"]:
+        sys.exit(f"Suites differ: {baseline['suite']} vs {current['suite']}")
+    before = {result["name"]: metric(result) for result in baseline["results"]}
+
+    print(f"{'scenario':36} {'baseline':>12} {'current':>12} {'change':>8}")
+    print(f"{'':36} {baseline['revision'][:12]:>12} {current['revision'][:12]:>12}")
+    regressions = []
+    for result in current["results"]:
+        name, now = result["name"], metric(result)
+        then = before.get(name)
+        if now is None:
+            regressions.append(name)
+            change = "FAILED"
+        elif then is None:
+            change = "n/a"
+        else:
+            ratio = now / then if then else 1.0
+            change = f"{ratio - 1:+.1%}"
+            if ratio > 1 + args.threshold:
+                regressions.append(name)
+                change += " !"
+        print(f"{name:36} {_format(then):>12} {_format(now):>12} {change:>8}")
+
+    if regressions:
+        print(f"\nRegressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+def _format(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.3f}ms"
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+# benchmarks/corpus.py
+"""Deterministic synthetic corpus: memory JSON files, embeddings and an edge graph.
+
+The same seed always produces byte-identical files, so results from different
+commits are measured on the same data.
+
+    python benchmarks/corpus.py --out /tmp/corpus --memories 5000 --edges 50000
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+from fake_ollama import fake_embedding
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'zu', 'be', 'do', 'fa', 'gi', 'ho', 'ju', 'pe']
+TAGS = ['python', 'graph', 'search', 'embedding', 'agent', 'memory', 'sqlite', 'ollama', 'debate', 'notes']
+RELATIONSHIP_TYPES = ['SIMILAR_CONTENT', 'SHARED_TAGS', 'RELATED_TOPIC', 'TEMPORALLY_CLOSE', 'RELATED_TO']
+EPOCH = datetime(2024, 1, 1)
+EMBEDDING_MODEL = 'fake-embed'
+
+def vocabulary(size: int, rng: random.Random) -> List[str]:
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+def sentence(words: List[str], weights: List[float], rng: random.Random, length: int) -> str:
+    return ' '.join(rng.choices(words, weights=weights, k=length))
+
+def memory_filename(index: int) -> str:
+    return f"memory_{index:06d}.json"
+
+def generate_memories(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Memory records shaped like the files memory_search reads."""
+    rng = random.Random(seed)
+    words = vocabulary(2000, rng)
+    weights = [1.0 / (rank + 1) for rank in range(len(words))]
+    memories = []
+    for i in range(count):
+        timestamp = (EPOCH + timedelta(minutes=rng.randrange(60 * 24 * 365))).isoformat() + 'Z'
+        record = {
+            "title": sentence(words, weights, rng, rng.randint(2, 6)),
+            "tags": rng.sample(TAGS, rng.randint(1, 3)),
+            "timestamp": timestamp,
+            "access_count": 0,
+            "permanent_marker": int(rng.random() < 0.05),
+        }
+        if rng.random() < 0.5:
+            record["type"] = "interaction"
+            record["content"] = {"prompt": sentence(words, weights, rng, rng.randint(5, 30)),
+                                 "response": sentence(words, weights, rng, rng.randint(20, 150))}
+        else:
+            record["type"] = "document_chunk"
+            record["content"] = sentence(words, weights, rng, rng.randint(50, 300))
+        memories.append(record)
+    return memories
+
+def memory_text(record: Dict[str, Any]) -> str:
+    content = record["content"]
+    if isinstance(content, dict):
+        return f"{content['prompt']}\n{content['response']}"
+    return str(content)
+
+def generate_edges(num_memories: int, num_edges: int, seed: int = 0, versions: int = 1):
+    """Yield edges rows between memory nodes (filename stems), with optional history."""
+    rng = random.Random(seed + 1)
+    seen = set()
+    while len(seen) < min(num_edges, num_memories * (num_memories - 1)):
+        source = rng.randrange(num_memories)
+        # Half the edges stay local so the graph has communities
+        target = (source + rng.randint(1, 50)) % num_memories if rng.random() < 0.5 else rng.randrange(num_memories)
+        relationship_type = rng.choice(RELATIONSHIP_TYPES)
+        key = (source, target, relationship_type)
+        if source == target or key in seen:
+            continue
+        seen.add(key)
+        moment = EPOCH + timedelta(minutes=rng.randrange(60 * 24 * 30))
+        bidirectional = int(relationship_type != 'RELATED_TO' or rng.random() < 0.5)
+        for version in range(versions):
+            end = moment + timedelta(days=rng.randint(1, 30))
+            yield (Path(memory_filename(source)).stem, Path(memory_filename(target)).stem, relationship_type,
+                   round(rng.random(), 4), bidirectional, moment.strftime('%Y-%m-%d %H:%M:%S.%f'),
+                   None if version == versions - 1 else end.strftime('%Y-%m-%d %H:%M:%S.%f'))
+            moment = end
+
+def write_corpus(out: Path, memories: int, edges: int, seed: int = 0, versions: int = 1,
+                 embeddings: bool = True) -> Dict[str, Any]:
+    """Write data/, embeddings/ and edges.db under `out` and return a manifest."""
+    from kb_graph.schema import SCHEMA
+    data_dir, embeddings_dir, db_path = out / 'data', out / 'embeddings', out / 'edges.db'
+    data_dir.mkdir(parents=True, exist_ok=True)
+    embeddings_dir.mkdir(parents=True, exist_ok=True)
+
+    records = generate_memories(memories, seed)
+    for i, record in enumerate(records):
+        (data_dir / memory_filename(i)).write_text(json.dumps(record, sort_keys=True))
+        if embeddings:
+            vector = fake_embedding(memory_text(record))
+            (embeddings_dir / f"{memory_filename(i)}.json").write_text(json.dumps(
+                {"model": EMBEDDING_MODEL, "dimension": len(vector), "embedding": vector}))
+    if embeddings:
+        (embeddings_dir / 'CURRENT').write_text(json.dumps(
+            {"generation": None, "model": EMBEDDING_MODEL, "dimension": len(vector) if records else None}))
+
+    db_path.unlink(missing_ok=True)
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(SCHEMA)
+        conn.executemany('''
+            INSERT INTO edges (source_id, target_id, relationship_type, strength, bidirectional, start_time, end_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', generate_edges(memories, edges, seed, versions))
+        edge_rows = conn.execute('SELECT COUNT(*) FROM edges').fetchone()[0]
+        conn.commit()
+
+    manifest = {"seed": seed, "memories": memories, "edges": edges, "edge_rows": edge_rows,
+                "versions": versions, "embedding_model": EMBEDDING_MODEL, "embeddings": embeddings,
+                "data_dir": str(data_dir), "embeddings_dir": str(embeddings_dir), "db_path": str(db_path)}
+    (out / 'manifest.json').write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+def main():
+    import common  # noqa: F401  (puts src/ on sys.path)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', required=True)
+    parser.add_argument('--memories', type=int, default=5000)
+    parser.add_argument('--edges', type=int, default=50000)
+    parser.add_argument('--versions', type=int, default=1, help="validity intervals per edge")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-embeddings', action='store_true', help="leave embeddings to be generated at ingest")
+    args = parser.parse_args()
+    manifest = write_corpus(Path(args.out), args.memories, args.edges, args.seed, args.versions,
+                            not args.no_embeddings)
+    print(json.dumps(manifest, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/fake_ollama.py
+"""Local stand-in for the Ollama embedding and generate APIs.
+
+Serves deterministic feature-hashed bag-of-words vectors, so texts sharing
+words get similar embeddings and runs are reproducible without a model.
+Completions are a small JSON summary of the prompt's most frequent words.
+
+    python benchmarks/fake_ollama.py --port 11435 --latency-ms 5
+    OLLAMA_HOST=http://127.0.0.1:11435 python ...
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import sys
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+DEFAULT_DIMENSION = 256
+
+def fake_embedding(text: str, dimension: int = DEFAULT_DIMENSION) -> List[float]:
+    vector = [0.0] * dimension
+    for token in str(text).lower().split():
+        digest = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'little')
+        vector[digest % dimension] += 1.0 if (digest >> 32) & 1 else -1.0
+    length = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / length for value in vector]
+
+def fake_completion(prompt: str) -> str:
+    words = [word.strip('.,:;!?"\'()[]{}').lower() for word in str(prompt).split()]
+    counts = Counter(word for word in words if len(word) > 3)
+    keywords = [word for word, _ in sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:5]]
+    return json.dumps({"keywords": keywords, "words": len(words)})
+
+def model_dimension(model: str, default: int) -> int:
+    """Models named like 'fake-embed:384' get that dimension."""
+    _, _, suffix = model.rpartition(':')
+    return int(suffix) if suffix.isdigit() else default
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    dimension = DEFAULT_DIMENSION
+    latency = 0.0
+    requests = 0
+
+    def _reply(self, status: int, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == '/api/version':
+            self._reply(200, {"version": "0.0.0-fake"})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        dimension = model_dimension(request.get('model', ''), self.dimension)
+        type(self).requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.path == '/api/embeddings':
+            self._reply(200, {"embedding": fake_embedding(request.get('prompt', ''), dimension)})
+        elif self.path == '/api/embed':
+            inputs = request.get('input', '')
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            self._reply(200, {"model": request.get('model', ''),
+                              "embeddings": [fake_embedding(text, dimension) for text in inputs]})
+        elif self.path == '/api/generate':
+            self._reply(200, {"model": request.get('model', ''), "created_at": "1970-01-01T00:00:00Z",
+                              "response": fake_completion(request.get('prompt', '')), "done": True})
+        else:
+            self._reply(404, {"error": f"unsupported endpoint {self.path}"})
+
+    def log_message(self, format, *args):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help="0 picks a free port")
+    parser.add_argument('--dimension', type=int, default=DEFAULT_DIMENSION)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="simulated model latency per request")
+    args = parser.parse_args()
+
+    FakeOllamaHandler.dimension = args.dimension
+    FakeOllamaHandler.latency = args.latency_ms / 1000
+    server = ThreadingHTTPServer((args.host, args.port), FakeOllamaHandler)
+    # The first line of output is the base URL, for callers that picked port 0
+    print(f"http://{args.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sys.exit(0)
+
+if __name__ == '__main__':
+    main()
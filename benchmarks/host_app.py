@@ -0,0 +1,111 @@
+# benchmarks/host_app.py
+"""Stand-ins for the Ollama Agents modules the packages import.
+
+memory_search and knowledge_extraction were split out of an application that
+provides `config`, `src.modules.logging_setup` and helper modules next to each
+package. install() registers small equivalents so both packages import and run
+here, for the benchmarks and for the test suite (tests/conftest.py). Model
+calls still go through the `ollama` client, i.e. to the fake endpoint that
+run_benchmarks.py starts; the tests patch them.
+"""
+
+import importlib
+import json
+import logging
+import sys
+import types
+from pathlib import Path
+from typing import Any, Dict, List
+
+import ollama
+
+logger = logging.getLogger('ollama_agents')
+
+def _module(name: str, **attrs) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+def _forward(name: str, target: str) -> types.ModuleType:
+    """Module resolving attributes from `target`, for relative imports of
+    application siblings that are packages of their own here."""
+    module = _module(name)
+    module.__getattr__ = lambda attr: getattr(importlib.import_module(target), attr)
+    return module
+
+# file_utils
+
+def read_json_file(path) -> Any:
+    with open(path) as f:
+        return json.load(f)
+
+def write_json_file(path, data: Any) -> None:
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+def get_json_files_in_directory(directory) -> List[Path]:
+    return sorted(Path(directory).glob('*.json'))
+
+def increment_json_field(path, field: str) -> None:
+    data = read_json_file(path)
+    data[field] = data.get(field, 0) + 1
+    write_json_file(path, data)
+
+# ollama_client
+
+def process_prompt(prompt: str, model: str, username: str) -> str:
+    return ollama.generate(model=model, prompt=prompt)["response"]
+
+# knowledge_extraction analyzers: one model call each, like the application's
+
+DEFAULT_MODEL = 'fake-chat'
+
+def _keywords(task: str, text: str) -> List[str]:
+    response = process_prompt(f"{task}. Reply in JSON.\n\n{text}", DEFAULT_MODEL, "Knowledge Extractor")
+    return json.loads(response).get("keywords", [])
+
+def extract_named_entities(text: str) -> List[Dict[str, str]]:
+    return [{"text": word, "label": "KEYWORD"} for word in _keywords("List the named entities", text)]
+
+def extract_entities_and_relationships(text: str) -> Dict[str, List[Dict[str, str]]]:
+    entities = [{"text": word, "label": "KEYWORD"} for word in _keywords("List entities and relationships", text)]
+    relationships = [{"subject": a["text"], "relationship": "RELATED_TO", "object": b["text"]}
+                     for a, b in zip(entities, entities[1:])]
+    return {"entities": entities, "relationships": relationships}
+
+def analyze_query_topic(text: str) -> Dict[str, Any]:
+    keywords = _keywords("Name the topic", text)
+    return {"topic": keywords[0] if keywords else "", "confidence": 0.5}
+
+def analyze_sentiment(text: str) -> Dict[str, Any]:
+    _keywords("Rate the sentiment", text)
+    return {"sentiment": "neutral", "score": 0.0}
+
+def install(data_dir: Path, embeddings_dir: Path, embedding_model: str, prefix: str = '') -> None:
+    """Register the stand-ins next to the packages imported as `{prefix}<package>`.
+
+    The benchmarks import the packages top-level as setup.py installs them
+    (prefix ''); the tests import them from the checkout's `src` package
+    (prefix 'src.'), which is the real one and is not replaced.
+    """
+    _module('config', DATA_DIR=Path(data_dir), EMBEDDINGS_DIR=Path(embeddings_dir),
+            EMBEDDING_MODEL=embedding_model, DEFAULT_MODEL=DEFAULT_MODEL)
+    if not prefix:
+        _module('src', __path__=[])
+    _module('src.modules', __path__=[])
+    _module('src.modules.logging_setup', logger=logger)
+
+    _module(f'{prefix}memory_search.file_utils', read_json_file=read_json_file, write_json_file=write_json_file,
+            get_json_files_in_directory=get_json_files_in_directory, increment_json_field=increment_json_field)
+    _module(f'{prefix}memory_search.logging_setup', logger=logger)
+    _module(f'{prefix}memory_search.ollama_client', process_prompt=process_prompt)
+    _forward(f'{prefix}memory_search.kb_graph', f'{prefix}kb_graph')
+
+    _forward(f'{prefix}knowledge_extraction.kb_graph', f'{prefix}kb_graph')
+    _module(f'{prefix}knowledge_extraction.knowledge_extraction', __path__=[])
+    for name, function in (('named_entity_recognizer', extract_named_entities),
+                           ('entity_relationship_extractor', extract_entities_and_relationships),
+                           ('query_topic_analyzer', analyze_query_topic),
+                           ('text_sentiment_analyzer', analyze_sentiment)):
+        _module(f'{prefix}knowledge_extraction.knowledge_extraction.{name}', **{function.__name__: function})
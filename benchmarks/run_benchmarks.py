@@ -0,0 +1,120 @@
+# benchmarks/run_benchmarks.py
+"""End-to-end benchmark suite for the package.
+
+Generates a deterministic corpus, starts the fake Ollama endpoint, installs
+the host application stand-ins from host_app.py and times ingest,
+search_memories, get_related_nodes, analyze_file_pair and extract_knowledge.
+Results are written as JSON for benchmarks/compare.py.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/compare.py baseline.json results.json
+"""
+
+import argparse
+import importlib
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import ROOT, emit_results, latency_summary, scenario
+from corpus import EMBEDDING_MODEL, generate_memories, memory_filename, memory_text, write_corpus
+
+def start_fake_ollama(latency_ms: float) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, str(ROOT / 'benchmarks' / 'fake_ollama.py'), '--port', '0', '--latency-ms', str(latency_ms)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    # The ollama client reads OLLAMA_HOST when it is first imported
+    os.environ['OLLAMA_HOST'] = process.stdout.readline().strip()
+    return process
+
+def measure(fn, inputs):
+    samples = []
+    for item in inputs:
+        started = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - started)
+    return latency_summary(samples)
+
+def _check_extraction(knowledge):
+    # extract_knowledge reports failures in its result rather than raising
+    if "error" in knowledge:
+        raise RuntimeError(knowledge["error"])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--memories', type=int, default=2000)
+    parser.add_argument('--edges', type=int, default=20000)
+    parser.add_argument('--versions', type=int, default=3, help="validity intervals per edge")
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--embed-latency-ms', type=float, default=0.0)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = []
+    fake_ollama = start_fake_ollama(args.embed_latency_ms)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            with scenario(results, 'ingest_corpus', memories=args.memories, edges=args.edges,
+                          versions=args.versions) as result:
+                manifest = write_corpus(tmp / 'corpus', args.memories, args.edges, args.seed,
+                                        args.versions, embeddings=False)
+                result["edge_rows"] = manifest["edge_rows"]
+            # Imported once OLLAMA_HOST points at the fake endpoint
+            import host_app
+            host_app.install(manifest["data_dir"], manifest["embeddings_dir"], EMBEDDING_MODEL)
+
+            from kb_graph import graph_operations
+            from kb_graph.graph_operations import analyze_file_pair, get_related_nodes
+            graph_operations.DB_PATH = Path(manifest["db_path"])
+
+            # memory_search embeds every memory without stored embeddings on import
+            memory_search = None
+            with scenario(results, 'ingest_embeddings', memories=args.memories):
+                memory_search = importlib.import_module('memory_search')
+
+            records = generate_memories(args.memories, args.seed)
+            queries = [' '.join(memory_text(rng.choice(records)).split()[:12]) for _ in range(args.queries)]
+            with scenario(results, 'search_memories', queries=len(queries)) as result:
+                if memory_search is None:
+                    raise RuntimeError("memory_search could not be imported")
+                result["latency"] = measure(lambda q: memory_search.search_memories(q, top_k=5), queries)
+                result["last_rerank_timing"] = dict(memory_search.last_rerank_timing)
+            with scenario(results, 'search_memories_dense_only', queries=len(queries)) as result:
+                if memory_search is None:
+                    raise RuntimeError("memory_search could not be imported")
+                result["latency"] = measure(
+                    lambda q: memory_search.search_memories(q, top_k=5, graph_rerank=False), queries)
+
+            node_ids = [Path(memory_filename(rng.randrange(args.memories))).stem for _ in range(args.queries)]
+            with scenario(results, 'get_related_nodes', queries=len(node_ids)) as result:
+                result["latency"] = measure(get_related_nodes, node_ids)
+            with scenario(results, 'get_related_nodes_as_of', queries=len(node_ids)) as result:
+                result["latency"] = measure(lambda n: get_related_nodes(n, as_of='2024-01-15T00:00:00'), node_ids)
+
+            # analyze_file_pair compares text content, as stored for document chunks
+            flattened = [dict(record, content=memory_text(record)) for record in records]
+            pairs = [(rng.choice(flattened), rng.choice(flattened)) for _ in range(args.queries)]
+            with scenario(results, 'analyze_file_pair', pairs=len(pairs)) as result:
+                result["latency"] = measure(lambda pair: analyze_file_pair(*pair), pairs)
+
+            texts = [memory_text(rng.choice(records)) for _ in range(args.queries)]
+            with scenario(results, 'extract_knowledge', texts=len(texts)) as result:
+                knowledge_extraction = importlib.import_module('knowledge_extraction')
+                result["latency"] = measure(lambda text: _check_extraction(knowledge_extraction.extract_knowledge(text)),
+                                            texts)
+    finally:
+        fake_ollama.terminate()
+        fake_ollama.wait()
+
+    emit_results('package', results, args.output)
+
+if __name__ == '__main__':
+    main()
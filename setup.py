@@ -32,6 +32,7 @@ setup(
         "rich",
         "spacy",
         "scikit-learn",
+        "scipy",
         "networkx",
     ],
     extras_require={
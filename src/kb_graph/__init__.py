@@ -1,4 +1,7 @@
 from .graph_operations import *
 from .schema import *
+from .hierarchy import *
 
-__all__ = ['create_edge', 'update_knowledge_graph', 'get_related_nodes', 'analyze_file_pair']
+__all__ = ['create_edge', 'close_edge', 'update_knowledge_graph', 'get_related_nodes', 'get_edges_in_window',
+           'migrate_edges_table', 'analyze_file_pair', 'get_neighbourhoods', 'invalidate_neighbourhoods',
+           'add_hierarchy', 'add_hierarchy_bulk', 'ancestors', 'descendants', 'subtree', 'rebuild_hierarchy_closure']
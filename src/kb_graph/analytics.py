@@ -0,0 +1,202 @@
+# src/kb_graph/analytics.py
+
+from typing import Dict, Any, List, Tuple
+from array import array
+import logging
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from .graph_operations import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_ATTRIBUTES = ('pagerank', 'degree', 'in_degree', 'out_degree', 'component')
+FETCH_BATCH_SIZE = 100000
+WRITE_BATCH_SIZE = 50000
+LOOKUP_BATCH_SIZE = 900
+
+def load_adjacency(conn) -> Tuple[List[str], sparse.csr_matrix]:
+    """Load the current edges into a weighted CSR matrix indexed by node position.
+
+    Bidirectional edges contribute an entry in each direction.
+    """
+    codes: Dict[str, int] = {}
+    sources, targets, weights = array('q'), array('q'), array('d')
+    cursor = conn.execute('SELECT source_id, target_id, strength, bidirectional FROM edges WHERE end_time IS NULL')
+    while rows := cursor.fetchmany(FETCH_BATCH_SIZE):
+        for source_id, target_id, strength, bidirectional in rows:
+            source = codes.setdefault(source_id, len(codes))
+            target = codes.setdefault(target_id, len(codes))
+            sources.append(source)
+            targets.append(target)
+            weights.append(strength)
+            if bidirectional:
+                sources.append(target)
+                targets.append(source)
+                weights.append(strength)
+    n = len(codes)
+    matrix = sparse.csr_matrix(
+        (np.frombuffer(weights, dtype=np.float64),
+         (np.frombuffer(sources, dtype=np.int64), np.frombuffer(targets, dtype=np.int64))),
+        shape=(n, n),
+    )
+    return list(codes), matrix
+
+def pagerank(matrix: sparse.csr_matrix, damping: float = 0.85, tol: float = 1e-8, max_iter: int = 100,
+             initial: np.ndarray = None) -> Tuple[np.ndarray, int]:
+    """Weighted PageRank by sparse power iteration; returns (ranks, iterations).
+
+    `initial` warm-starts the iteration, e.g. from the previous run's ranks.
+    """
+    n = matrix.shape[0]
+    if n == 0:
+        return np.zeros(0), 0
+    out_weight = np.asarray(matrix.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inv_out = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+    transition_t = (sparse.diags(inv_out) @ matrix).T.tocsr()
+
+    rank = np.full(n, 1.0 / n) if initial is None else initial / initial.sum()
+    for iteration in range(1, max_iter + 1):
+        new_rank = damping * (transition_t @ rank + rank[dangling].sum() / n) + (1 - damping) / n
+        delta = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        if delta < tol:
+            break
+    return rank, iteration
+
+def weak_components(matrix: sparse.csr_matrix, node_ids: List[str]) -> List[str]:
+    """Label each node with the smallest node id in its weakly connected component.
+
+    Using a node id rather than scipy's arbitrary label keeps labels stable
+    between runs, so unchanged components are not rewritten.
+    """
+    _, labels = connected_components(matrix, directed=True, connection='weak')
+    ids = np.array(node_ids, dtype=object)
+    order = np.argsort(ids)
+    position = np.empty(len(ids), dtype=np.int64)
+    position[order] = np.arange(len(ids))
+    representative = np.full(labels.max() + 1 if len(labels) else 0, len(ids), dtype=np.int64)
+    np.minimum.at(representative, labels, position)
+    return list(ids[order][representative[labels]])
+
+def _edges_signature(conn) -> Tuple[Any, int]:
+    return conn.execute('''
+        SELECT (SELECT MAX(id) FROM edges), version FROM edges_version WHERE id = 1
+    ''').fetchone()
+
+def _load_attributes(conn, names) -> Dict[Tuple[str, str], str]:
+    placeholders = ','.join('?' * len(names))
+    cursor = conn.execute(f'''
+        SELECT node_id, attribute_name, attribute_value
+        FROM node_attributes
+        WHERE attribute_name IN ({placeholders})
+    ''', names)
+    return {(node_id, name): value for node_id, name, value in cursor}
+
+def run_graph_analytics(force: bool = False, damping: float = 0.85) -> Dict[str, Any]:
+    """Compute PageRank, degrees and weak components and store them as node_attributes.
+
+    The job is incremental: it is skipped when the edges table has not changed
+    since the last run, PageRank is warm-started from the stored values, and
+    only attribute values that actually changed are written.
+    """
+    started = time.perf_counter()
+    with get_db_connection() as conn:
+        signature = _edges_signature(conn)
+        last = conn.execute('''
+            SELECT max_edge_id, edges_version
+            FROM graph_analytics_runs ORDER BY id DESC LIMIT 1
+        ''').fetchone()
+        if not force and last is not None and tuple(last) == tuple(signature):
+            logger.info("Graph analytics skipped: edges unchanged since last run")
+            return {"skipped": True}
+
+        node_ids, matrix = load_adjacency(conn)
+        loaded = time.perf_counter()
+        existing = _load_attributes(conn, ANALYTICS_ATTRIBUTES)
+
+        initial = None
+        if existing:
+            default = 1.0 / max(len(node_ids), 1)
+            initial = np.array([float(existing.get((node_id, 'pagerank'), default)) for node_id in node_ids])
+        ranks, iterations = pagerank(matrix, damping=damping, initial=initial)
+        binary = matrix.astype(bool)
+        out_degree = np.diff(binary.indptr)
+        in_degree = np.bincount(binary.indices, minlength=len(node_ids))
+        components = weak_components(matrix, node_ids)
+        computed = time.perf_counter()
+
+        columns = {
+            'pagerank': ['%.10g' % value for value in ranks],
+            'degree': [str(value) for value in (in_degree + out_degree)],
+            'in_degree': [str(value) for value in in_degree],
+            'out_degree': [str(value) for value in out_degree],
+            'component': components,
+        }
+        changed = [
+            (node_id, name, values[i], 1.0)
+            for name, values in columns.items()
+            for i, node_id in enumerate(node_ids)
+            if existing.get((node_id, name)) != values[i]
+        ]
+        # Writing in primary key order keeps the B-tree inserts sequential
+        changed.sort()
+        for i in range(0, len(changed), WRITE_BATCH_SIZE):
+            conn.executemany('''
+                INSERT INTO node_attributes (node_id, attribute_name, attribute_value, confidence)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(node_id, attribute_name) DO UPDATE SET
+                    attribute_value = excluded.attribute_value,
+                    confidence = excluded.confidence
+            ''', changed[i:i + WRITE_BATCH_SIZE])
+
+        # Nodes that lost all their edges keep no stale analytics
+        stale = {node_id for node_id, _ in existing}.difference(node_ids)
+        conn.executemany('DELETE FROM node_attributes WHERE node_id = ? AND attribute_name = ?',
+                         [(node_id, name) for node_id in stale for name in ANALYTICS_ATTRIBUTES])
+        conn.execute('INSERT INTO graph_analytics_runs (max_edge_id, edges_version) VALUES (?, ?)', signature)
+        conn.commit()
+
+    summary = {
+        "skipped": False,
+        "nodes": len(node_ids),
+        "edges": int(matrix.nnz),
+        "components": len(set(components)),
+        "pagerank_iterations": iterations,
+        "attributes_written": len(changed),
+        "stale_nodes": len(stale),
+        "load_seconds": loaded - started,
+        "compute_seconds": computed - loaded,
+        "write_seconds": time.perf_counter() - computed,
+    }
+    logger.info(f"Graph analytics completed: {summary}")
+    return summary
+
+def get_node_attributes(node_id: str) -> Dict[str, str]:
+    with get_db_connection() as conn:
+        cursor = conn.execute('''
+            SELECT attribute_name, attribute_value
+            FROM node_attributes
+            WHERE node_id = ?
+        ''', (node_id,))
+        return dict(cursor.fetchall())
+
+def get_node_importance(node_ids: List[str]) -> Dict[str, float]:
+    """Stored PageRank for node_ids; nodes without analytics are omitted."""
+    importance = {}
+    node_ids = list(dict.fromkeys(node_ids))
+    with get_db_connection() as conn:
+        for i in range(0, len(node_ids), LOOKUP_BATCH_SIZE):
+            batch = node_ids[i:i + LOOKUP_BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            cursor = conn.execute(f'''
+                SELECT node_id, attribute_value
+                FROM node_attributes
+                WHERE attribute_name = 'pagerank' AND node_id IN ({placeholders})
+            ''', batch)
+            importance.update((node_id, float(value)) for node_id, value in cursor)
+    return importance
@@ -3,11 +3,16 @@
 import json
 import hashlib
 import sqlite3
-from datetime import datetime, timedelta
-from typing import Dict, Any, List, Tuple
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Iterable, List, Optional, Tuple, Union
 from pathlib import Path
 import logging
 
+from .schema import SCHEMA
+
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -15,24 +20,168 @@ DB_DIR = Path('data/edgebase')
 DB_FILE = 'knowledge_edges.db'
 DB_PATH = DB_DIR / DB_FILE
 
+# Neighbourhood cache: node_id -> {(relationship_type, max_neighbours): [(neighbour_id, relationship_type, strength)]}
+NEIGHBOURHOOD_CACHE_SIZE = 10000
+# Nodes per batched query; named parameters keep it under SQLite's 999 limit
+NEIGHBOURHOOD_BATCH_SIZE = 400
+# Strongest edges kept per node, so hub nodes cost the same as any other
+NEIGHBOURHOOD_MAX_NEIGHBOURS = 10
+# SQLite VM instructions between checks of the fetch deadline
+NEIGHBOURHOOD_PROGRESS_STEPS = 1000
+
+_neighbourhood_cache: "OrderedDict[str, Dict[Tuple[Optional[str], int], List[Tuple[str, str, float]]]]" = OrderedDict()
+_neighbourhood_cache_lock = threading.Lock()
+# Bumped by every invalidation; a fetch that raced with one is not cached
+_neighbourhood_generation = 0
+
+# Edges tables created before validity intervals carry this table constraint
+LEGACY_EDGES_CONSTRAINT = 'UNIQUE(source_id, target_id, relationship_type)'
+# Databases whose edges table is known to be versioned, so writes check only once
+_versioned_databases = set()
+_versioned_databases_lock = threading.Lock()
+
 def get_db_connection():
     return sqlite3.connect(DB_PATH)
 
-def create_edge(source_id: str, target_id: str, relationship_type: str, strength: float):
+def _timestamp(value: Union[datetime, str] = None) -> str:
+    """Normalise to a UTC 'YYYY-MM-DD HH:MM:SS.ffffff' string, which sorts like
+    SQLite's CURRENT_TIMESTAMP. Naive datetimes are taken to be UTC."""
+    if value is None:
+        value = datetime.now(timezone.utc)
+    elif isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+def _has_legacy_edges_table(conn) -> bool:
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'edges'").fetchone()
+    return bool(row) and LEGACY_EDGES_CONSTRAINT in row[0]
+
+def _ensure_versioned_edges():
+    """Migrate a legacy edges table the first time this process writes to it.
+
+    Re-running SCHEMA does not remove the old table constraint, which would make
+    every new edge version fail with an IntegrityError.
+    """
+    with _versioned_databases_lock:
+        if str(DB_PATH) in _versioned_databases:
+            return
+        with get_db_connection() as conn:
+            legacy = _has_legacy_edges_table(conn)
+        if legacy:
+            logger.warning(f"Edges table in {DB_PATH} predates validity intervals; migrating it")
+            migrate_edges_table()
+        _versioned_databases.add(str(DB_PATH))
+
+def migrate_edges_table():
+    """Bring an edges table created before validity intervals up to date.
+
+    Older databases have UNIQUE(source_id, target_id, relationship_type),
+    which forbids keeping an edge's history; the table is rebuilt without it.
+    Their rows are marked bidirectional, since get_related_nodes used to follow
+    every edge both ways. Rows without a start_time get their created_at.
+    """
+    with get_db_connection() as conn:
+        if _has_legacy_edges_table(conn):
+            # Indexes and triggers follow a renamed table, so drop them to let
+            # SCHEMA recreate them on the new one.
+            attached = conn.execute('''
+                SELECT type, name FROM sqlite_master
+                WHERE tbl_name = 'edges' AND type IN ('index', 'trigger') AND sql IS NOT NULL
+            ''').fetchall()
+            drops = ''.join(f'DROP {kind.upper()} {name};\n' for kind, name in attached)
+            conn.executescript(f'''
+                BEGIN;
+                {drops}
+                ALTER TABLE edges RENAME TO edges_unversioned;
+                {SCHEMA}
+                INSERT INTO edges (id, source_id, target_id, relationship_type, strength, confidence,
+                                   bidirectional, start_time, end_time, metadata, created_at, updated_at)
+                SELECT id, source_id, target_id, relationship_type, strength, confidence,
+                       TRUE, start_time, end_time, metadata, created_at, updated_at
+                FROM edges_unversioned;
+                DROP TABLE edges_unversioned;
+                COMMIT;
+            ''')
+            logger.info("Migrated edges table to versioned edges")
+        else:
+            conn.executescript(SCHEMA)
+        conn.execute('UPDATE edges SET start_time = created_at WHERE start_time IS NULL')
+        conn.commit()
+    invalidate_neighbourhoods()
+
+def create_edge(source_id: str, target_id: str, relationship_type: str, strength: float,
+                confidence: float = 1.0, bidirectional: Optional[bool] = None,
+                valid_from: Union[datetime, str] = None):
+    """Create or update an edge without losing its history.
+
+    If the edge already exists with different values, its current version is
+    closed at valid_from (default: now) and a new version starts there.
+    bidirectional=None keeps the current version's flag (False for a new edge).
+    Raises ValueError if valid_from is before the current version's start.
+    """
+    valid_from = _timestamp(valid_from)
+    _ensure_versioned_edges()
     with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute('''
-            INSERT OR REPLACE INTO edges (source_id, target_id, relationship_type, strength)
-            VALUES (?, ?, ?, ?)
-        ''', (source_id, target_id, relationship_type, strength))
+            SELECT id, strength, confidence, bidirectional, start_time
+            FROM edges
+            WHERE source_id = ? AND target_id = ? AND relationship_type = ? AND end_time IS NULL
+        ''', (source_id, target_id, relationship_type))
+        current = cursor.fetchone()
+        if bidirectional is None:
+            bidirectional = bool(current and current[3])
+        if current and tuple(current[1:4]) == (strength, confidence, int(bidirectional)):
+            return
+        if current and current[4] is not None and valid_from < current[4]:
+            raise ValueError(f"Edge {source_id} -> {target_id} ({relationship_type}) has a version starting at "
+                             f"{current[4]}, after valid_from {valid_from}")
+        if current:
+            cursor.execute('UPDATE edges SET end_time = ? WHERE id = ?', (valid_from, current[0]))
+        cursor.execute('''
+            INSERT INTO edges (source_id, target_id, relationship_type, strength, confidence, bidirectional, start_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (source_id, target_id, relationship_type, strength, confidence, int(bidirectional), valid_from))
         conn.commit()
+    invalidate_neighbourhoods([source_id, target_id])
     logger.info(f"Edge created: {source_id} -> {target_id} ({relationship_type})")
 
+def close_edge(source_id: str, target_id: str, relationship_type: str,
+               valid_to: Union[datetime, str] = None) -> bool:
+    """End the current version of an edge; returns False if it had none.
+
+    Raises ValueError if valid_to is before the current version's start.
+    """
+    valid_to = _timestamp(valid_to)
+    _ensure_versioned_edges()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT start_time FROM edges
+            WHERE source_id = ? AND target_id = ? AND relationship_type = ? AND end_time IS NULL
+        ''', (source_id, target_id, relationship_type))
+        current = cursor.fetchone()
+        if current and current[0] is not None and valid_to < current[0]:
+            raise ValueError(f"Edge {source_id} -> {target_id} ({relationship_type}) started at {current[0]}, "
+                             f"after valid_to {valid_to}")
+        cursor.execute('''
+            UPDATE edges SET end_time = ?
+            WHERE source_id = ? AND target_id = ? AND relationship_type = ? AND end_time IS NULL
+        ''', (valid_to, source_id, target_id, relationship_type))
+        closed = cursor.rowcount > 0
+        conn.commit()
+    invalidate_neighbourhoods([source_id, target_id])
+    if closed:
+        logger.info(f"Edge closed: {source_id} -> {target_id} ({relationship_type})")
+    return closed
+
 def update_knowledge_graph(new_information: str):
     key_concepts = extract_key_concepts(new_information)
     info_id = hashlib.md5(new_information.encode()).hexdigest()
     for concept in key_concepts:
-        create_edge(info_id, concept, "RELATED_TO", 1.0)
+        create_edge(info_id, concept, "RELATED_TO", 1.0, bidirectional=True)
     logger.info(f"Updated knowledge graph with new information (ID: {info_id})")
 
 def extract_key_concepts(information: str) -> List[str]:
@@ -42,31 +191,155 @@ def extract_key_concepts(information: str) -> List[str]:
         word_freq[word] = word_freq.get(word, 0) + 1
     return [word for word, freq in word_freq.items() if freq > 1]
 
-def get_related_nodes(node_id: str, relationship_type: str = None) -> List[Tuple[str, str, float]]:
+def _touching_edges_sql(columns: str, historical: bool, relationship_type: str = None) -> str:
+    """Query for edges leaving :node_id, or entering it if bidirectional.
+
+    Current edges are the open ones. Historical queries return versions valid
+    at some instant of [:valid_from, :valid_to]. Each OR term maps onto a range
+    seek of the (node, end_time, start_time) indexes. Current lookups read only
+    open versions; historical ones read every version that ended after
+    :valid_from, so an early as_of still scans most of the node's history.
+    Reciprocal bidirectional edges would match twice, hence DISTINCT.
+    """
+    directions = ['source_id = :node_id', 'target_id = :node_id AND bidirectional']
+    validity = ['end_time IS NULL']
+    if historical:
+        validity.append('end_time > :valid_from')
+    terms = ' OR '.join(f'({d} AND {v})' for d in directions for v in validity)
+    query = f'''
+        SELECT DISTINCT {columns}
+        FROM edges
+        WHERE ({terms})
+    '''
+    if historical:
+        query += ' AND start_time <= :valid_to'
+    if relationship_type:
+        # Unary + keeps the planner off the low-selectivity relationship_type index
+        query += ' AND +relationship_type = :relationship_type'
+    return query
+
+def get_related_nodes(node_id: str, relationship_type: str = None,
+                      as_of: Union[datetime, str] = None) -> List[Tuple[str, str, float]]:
+    """(neighbour_id, relationship_type, strength) for the current edges of a
+    node, or for the edges valid at `as_of`."""
+    params = {'node_id': node_id, 'relationship_type': relationship_type}
+    if as_of is not None:
+        params['valid_from'] = params['valid_to'] = _timestamp(as_of)
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        if relationship_type:
-            cursor.execute('''
-                SELECT target_id, relationship_type, strength
-                FROM edges
-                WHERE source_id = ? AND relationship_type = ?
-                UNION
-                SELECT source_id, relationship_type, strength
-                FROM edges
-                WHERE target_id = ? AND relationship_type = ?
-            ''', (node_id, relationship_type, node_id, relationship_type))
-        else:
-            cursor.execute('''
-                SELECT target_id, relationship_type, strength
-                FROM edges
-                WHERE source_id = ?
-                UNION
-                SELECT source_id, relationship_type, strength
-                FROM edges
-                WHERE target_id = ?
-            ''', (node_id, node_id))
+        cursor.execute(_touching_edges_sql(
+            'CASE WHEN source_id = :node_id THEN target_id ELSE source_id END, relationship_type, strength',
+            as_of is not None, relationship_type), params)
+        return cursor.fetchall()
+
+def get_edges_in_window(node_id: str, valid_from: Union[datetime, str], valid_to: Union[datetime, str],
+                        relationship_type: str = None) -> List[Tuple[str, str, float, str, Optional[str]]]:
+    """(neighbour_id, relationship_type, strength, start_time, end_time) for every
+    edge version of a node valid at some point between valid_from and valid_to."""
+    params = {'node_id': node_id, 'relationship_type': relationship_type,
+              'valid_from': _timestamp(valid_from), 'valid_to': _timestamp(valid_to)}
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_touching_edges_sql(
+            'CASE WHEN source_id = :node_id THEN target_id ELSE source_id END, '
+            'relationship_type, strength, start_time, end_time',
+            True, relationship_type) + ' ORDER BY start_time', params)
         return cursor.fetchall()
 
+def invalidate_neighbourhoods(node_ids: Iterable[str] = None):
+    """Drop cached neighbourhoods for node_ids, or the whole cache if None.
+
+    Only writes made through this process are seen; call with None after
+    edges are changed by another process.
+    """
+    global _neighbourhood_generation
+    with _neighbourhood_cache_lock:
+        _neighbourhood_generation += 1
+        if node_ids is None:
+            _neighbourhood_cache.clear()
+        else:
+            for node_id in node_ids:
+                _neighbourhood_cache.pop(node_id, None)
+
+def _fetch_neighbourhoods(conn, node_ids: List[str], relationship_type: Optional[str],
+                          max_neighbours: int) -> Dict[str, List[Tuple[str, str, float]]]:
+    fetched = {node_id: [] for node_id in node_ids}
+    type_filter = ' AND +relationship_type = :relationship_type' if relationship_type else ''
+    for i in range(0, len(node_ids), NEIGHBOURHOOD_BATCH_SIZE):
+        batch = node_ids[i:i + NEIGHBOURHOOD_BATCH_SIZE]
+        params = {f'n{j}': node_id for j, node_id in enumerate(batch)}
+        placeholders = ','.join(f':{name}' for name in params)
+        params.update(relationship_type=relationship_type, max_neighbours=max_neighbours)
+        rows = conn.execute(f'''
+            SELECT node_id, neighbour_id, relationship_type, strength
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY node_id ORDER BY strength DESC) AS position
+                FROM (
+                    SELECT source_id AS node_id, target_id AS neighbour_id, relationship_type, strength
+                    FROM edges
+                    WHERE source_id IN ({placeholders}) AND end_time IS NULL{type_filter}
+                    UNION
+                    SELECT target_id, source_id, relationship_type, strength
+                    FROM edges
+                    WHERE target_id IN ({placeholders}) AND end_time IS NULL AND bidirectional{type_filter}
+                )
+            )
+            WHERE position <= :max_neighbours
+            ORDER BY node_id, position
+        ''', params).fetchall()
+        for node_id, neighbour_id, rel_type, strength in rows:
+            fetched[node_id].append((neighbour_id, rel_type, strength))
+    return fetched
+
+def get_neighbourhoods(node_ids: List[str], relationship_type: str = None,
+                       max_neighbours: int = NEIGHBOURHOOD_MAX_NEIGHBOURS,
+                       budget_ms: float = None) -> Dict[str, List[Tuple[str, str, float]]]:
+    """Batched, cached equivalent of calling get_related_nodes for each node
+    (current edges only), keeping each node's max_neighbours strongest edges.
+
+    With budget_ms the database fetch is interrupted once it runs over budget
+    and TimeoutError is raised.
+    """
+    key = (relationship_type, max_neighbours)
+    neighbourhoods = {}
+    missing = []
+    with _neighbourhood_cache_lock:
+        generation = _neighbourhood_generation
+        for node_id in dict.fromkeys(node_ids):
+            cached = _neighbourhood_cache.get(node_id, {})
+            if key in cached:
+                _neighbourhood_cache.move_to_end(node_id)
+                neighbourhoods[node_id] = cached[key]
+            else:
+                missing.append(node_id)
+    if not missing:
+        return neighbourhoods
+
+    with get_db_connection() as conn:
+        if budget_ms is not None:
+            deadline = time.perf_counter() + budget_ms / 1000
+            conn.set_progress_handler(lambda: time.perf_counter() > deadline, NEIGHBOURHOOD_PROGRESS_STEPS)
+        try:
+            fetched = _fetch_neighbourhoods(conn, missing, relationship_type, max_neighbours)
+        except sqlite3.OperationalError as e:
+            if budget_ms is not None and 'interrupted' in str(e):
+                raise TimeoutError(f"Neighbourhood fetch exceeded {budget_ms} ms") from e
+            raise
+        finally:
+            if budget_ms is not None:
+                conn.set_progress_handler(None, 0)
+    neighbourhoods.update(fetched)
+
+    with _neighbourhood_cache_lock:
+        # An invalidation during the fetch may cover rows read before it
+        if generation == _neighbourhood_generation:
+            for node_id, edges in fetched.items():
+                _neighbourhood_cache.setdefault(node_id, {})[key] = edges
+                _neighbourhood_cache.move_to_end(node_id)
+            while len(_neighbourhood_cache) > NEIGHBOURHOOD_CACHE_SIZE:
+                _neighbourhood_cache.popitem(last=False)
+    return neighbourhoods
+
 def analyze_file_pair(file1: Dict[str, Any], file2: Dict[str, Any]) -> List[Tuple[str, float]]:
     logger.info(f"Analyzing file pair:")
     logger.info(f"File 1: {file1}")
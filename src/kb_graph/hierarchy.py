@@ -0,0 +1,146 @@
+# src/kb_graph/hierarchy.py
+
+from collections import defaultdict, deque
+from typing import Iterable, List, Tuple
+import logging
+
+from .graph_operations import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# hierarchy_closure holds one row per (ancestor, descendant) pair, including a
+# depth-0 row for every node, so ancestor/descendant/subtree lookups are single
+# range scans: ancestors over the primary key, descendants over the covering
+# (hierarchy_type, ancestor_id, depth) index. Depth is the shortest path length.
+
+def _topological_order(pairs: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Order pairs so each parent is linked before its children are, which keeps
+    the closure update for every new edge proportional to the parent's depth."""
+    children = defaultdict(list)
+    indegree = defaultdict(int)
+    for parent, child in pairs:
+        children[parent].append(child)
+        indegree[child] += 1
+        indegree.setdefault(parent, 0)
+    queue = deque(node for node, degree in indegree.items() if degree == 0)
+    ordered = []
+    while queue:
+        parent = queue.popleft()
+        for child in children[parent]:
+            ordered.append((parent, child))
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                queue.append(child)
+    if len(ordered) != len(pairs):
+        raise ValueError("Hierarchy edges contain a cycle")
+    return ordered
+
+def _link(cursor, parent_id: str, child_id: str, hierarchy_type: str):
+    if parent_id == child_id:
+        raise ValueError(f"Node {parent_id} cannot be its own parent")
+    cursor.execute('''
+        SELECT 1 FROM hierarchy_closure
+        WHERE hierarchy_type = ? AND ancestor_id = ? AND descendant_id = ?
+    ''', (hierarchy_type, child_id, parent_id))
+    if cursor.fetchone():
+        raise ValueError(f"Adding {parent_id} -> {child_id} would create a cycle in {hierarchy_type}")
+    cursor.executemany('''
+        INSERT OR IGNORE INTO hierarchy_closure (hierarchy_type, ancestor_id, descendant_id, depth)
+        VALUES (?, ?, ?, 0)
+    ''', [(hierarchy_type, parent_id, parent_id), (hierarchy_type, child_id, child_id)])
+    cursor.execute('''
+        INSERT INTO hierarchy_closure (hierarchy_type, ancestor_id, descendant_id, depth)
+        SELECT ?, a.ancestor_id, d.descendant_id, a.depth + d.depth + 1
+        FROM hierarchy_closure a, hierarchy_closure d
+        WHERE a.hierarchy_type = ? AND a.descendant_id = ?
+        AND d.hierarchy_type = ? AND d.ancestor_id = ?
+        ON CONFLICT (hierarchy_type, descendant_id, ancestor_id)
+        DO UPDATE SET depth = MIN(depth, excluded.depth)
+    ''', (hierarchy_type, hierarchy_type, parent_id, hierarchy_type, child_id))
+
+def add_hierarchy_bulk(pairs: Iterable[Tuple[str, str]], hierarchy_type: str, confidence: float = 1.0) -> int:
+    """Add (parent_id, child_id) pairs in one transaction and maintain the closure.
+
+    Pairs that already exist are ignored. Raises ValueError, adding nothing, if
+    any pair would create a cycle. Returns the number of new pairs.
+    """
+    pairs = _topological_order(list(dict.fromkeys(pairs)))
+    added = 0
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for parent_id, child_id in pairs:
+            cursor.execute('''
+                INSERT OR IGNORE INTO hierarchies (parent_id, child_id, hierarchy_type, confidence)
+                VALUES (?, ?, ?, ?)
+            ''', (parent_id, child_id, hierarchy_type, confidence))
+            if cursor.rowcount == 0:
+                continue
+            _link(cursor, parent_id, child_id, hierarchy_type)
+            added += 1
+        conn.commit()
+    logger.info(f"Added {added} {hierarchy_type} hierarchy edges")
+    return added
+
+def add_hierarchy(parent_id: str, child_id: str, hierarchy_type: str, confidence: float = 1.0) -> bool:
+    return add_hierarchy_bulk([(parent_id, child_id)], hierarchy_type, confidence) == 1
+
+def rebuild_hierarchy_closure(hierarchy_type: str = None):
+    """Recompute the closure from the hierarchies table, e.g. for rows written
+    before the closure existed or by other tools."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if hierarchy_type:
+            types = [hierarchy_type]
+        else:
+            cursor.execute('SELECT DISTINCT hierarchy_type FROM hierarchies')
+            types = [row[0] for row in cursor.fetchall()]
+        for h_type in types:
+            cursor.execute('DELETE FROM hierarchy_closure WHERE hierarchy_type = ?', (h_type,))
+            cursor.execute('SELECT parent_id, child_id FROM hierarchies WHERE hierarchy_type = ?', (h_type,))
+            for parent_id, child_id in _topological_order(cursor.fetchall()):
+                _link(cursor, parent_id, child_id, h_type)
+        conn.commit()
+    logger.info(f"Rebuilt hierarchy closure for {len(types)} hierarchy types")
+
+def _closure_lookup(select_column: str, key_column: str, node_id: str, hierarchy_type: str,
+                    max_depth: int = None) -> List[Tuple[str, int]]:
+    query = f'''
+        SELECT {select_column}, depth
+        FROM hierarchy_closure
+        WHERE hierarchy_type = ? AND {key_column} = ? AND depth >= 1
+    '''
+    params = [hierarchy_type, node_id]
+    if max_depth is not None:
+        query += ' AND depth <= ?'
+        params.append(max_depth)
+    query += f' ORDER BY depth, {select_column}'
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+def ancestors(node_id: str, hierarchy_type: str, max_depth: int = None) -> List[Tuple[str, int]]:
+    """(ancestor_id, depth) pairs, nearest first."""
+    return _closure_lookup('ancestor_id', 'descendant_id', node_id, hierarchy_type, max_depth)
+
+def descendants(node_id: str, hierarchy_type: str, max_depth: int = None) -> List[Tuple[str, int]]:
+    """(descendant_id, depth) pairs, nearest first."""
+    return _closure_lookup('descendant_id', 'ancestor_id', node_id, hierarchy_type, max_depth)
+
+def subtree(node_id: str, hierarchy_type: str) -> List[Tuple[str, str]]:
+    """(parent_id, child_id) edges of the hierarchy below node_id.
+
+    Edges from parents outside the subtree (possible when a node has several
+    parents) are excluded.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT h.parent_id, h.child_id
+            FROM hierarchy_closure c
+            JOIN hierarchies h
+                ON h.hierarchy_type = c.hierarchy_type AND h.parent_id = c.descendant_id
+            WHERE c.hierarchy_type = ? AND c.ancestor_id = ?
+            ORDER BY c.depth, h.parent_id, h.child_id
+        ''', (hierarchy_type, node_id))
+        return cursor.fetchall()
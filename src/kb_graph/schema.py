@@ -13,8 +13,7 @@ CREATE TABLE IF NOT EXISTS edges (
     end_time TIMESTAMP,
     metadata JSON,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(source_id, target_id, relationship_type)
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE TABLE IF NOT EXISTS node_attributes (
@@ -37,14 +36,41 @@ CREATE TABLE IF NOT EXISTS hierarchies (
     PRIMARY KEY (parent_id, child_id, hierarchy_type)
 );
 
-CREATE INDEX IF NOT EXISTS idx_edges_source_id ON edges(source_id);
-CREATE INDEX IF NOT EXISTS idx_edges_target_id ON edges(target_id);
+CREATE TABLE IF NOT EXISTS hierarchy_closure (
+    hierarchy_type TEXT NOT NULL,
+    ancestor_id TEXT NOT NULL,
+    descendant_id TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    PRIMARY KEY (hierarchy_type, descendant_id, ancestor_id)
+) WITHOUT ROWID;
+
+-- Bumped by triggers on every UPDATE or DELETE of edges. Inserts always take a new
+-- AUTOINCREMENT id, so (MAX(edges.id), version) changes on every write to edges
+-- without slowing down bulk loads.
+CREATE TABLE IF NOT EXISTS edges_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO edges_version (id, version) VALUES (1, 0);
+
+CREATE TABLE IF NOT EXISTS graph_analytics_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    max_edge_id INTEGER,
+    edges_version INTEGER NOT NULL,
+    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- An edge keeps one row per validity interval; only one may be open (end_time IS NULL)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_edges_open ON edges(source_id, target_id, relationship_type) WHERE end_time IS NULL;
+CREATE INDEX IF NOT EXISTS idx_edges_source_validity ON edges(source_id, end_time, start_time);
+CREATE INDEX IF NOT EXISTS idx_edges_target_validity ON edges(target_id, end_time, start_time);
 CREATE INDEX IF NOT EXISTS idx_edges_relationship_type ON edges(relationship_type);
 CREATE INDEX IF NOT EXISTS idx_edges_start_time ON edges(start_time);
 CREATE INDEX IF NOT EXISTS idx_edges_end_time ON edges(end_time);
 CREATE INDEX IF NOT EXISTS idx_node_attributes_node_id ON node_attributes(node_id);
 CREATE INDEX IF NOT EXISTS idx_hierarchies_parent_id ON hierarchies(parent_id);
 CREATE INDEX IF NOT EXISTS idx_hierarchies_child_id ON hierarchies(child_id);
+CREATE INDEX IF NOT EXISTS idx_hierarchy_closure_descendants ON hierarchy_closure(hierarchy_type, ancestor_id, depth, descendant_id);
 
 CREATE TRIGGER IF NOT EXISTS update_edges_timestamp
 AFTER UPDATE ON edges
@@ -52,6 +78,18 @@ BEGIN
     UPDATE edges SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
 END;
 
+CREATE TRIGGER IF NOT EXISTS bump_edges_version_update
+AFTER UPDATE ON edges
+BEGIN
+    UPDATE edges_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS bump_edges_version_delete
+AFTER DELETE ON edges
+BEGIN
+    UPDATE edges_version SET version = version + 1 WHERE id = 1;
+END;
+
 CREATE TRIGGER IF NOT EXISTS update_node_attributes_timestamp
 AFTER UPDATE ON node_attributes
 BEGIN
@@ -2,6 +2,7 @@
 
 from typing import List, Dict, Any
 from src.modules.logging_setup import logger
+from .kb_graph import extract_key_concepts
 from .knowledge_extraction.named_entity_recognizer import extract_named_entities
 from .knowledge_extraction.entity_relationship_extractor import extract_entities_and_relationships
 from .knowledge_extraction.query_topic_analyzer import analyze_query_topic
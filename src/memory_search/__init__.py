@@ -1,3 +1,4 @@
 from .search import *
 
-__all__ = ['search_memories', 'get_embeddings', 'find_most_similar']
+__all__ = ['search_memories', 'get_embeddings', 'find_most_similar', 'reembed_memories',
+           'start_background_reembedding', 'resume_pending_reembedding']
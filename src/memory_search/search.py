@@ -4,13 +4,28 @@ import numpy as np
 from numpy.linalg import norm
 import ollama
 import json
-from typing import List, Tuple, Dict, Any
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import List, Tuple, Dict, Any, Optional, Set
 from pathlib import Path
 from config import DATA_DIR, EMBEDDINGS_DIR, EMBEDDING_MODEL, DEFAULT_MODEL
-from .file_utils import read_json_file, write_json_file, get_json_files_in_directory, increment_json_field
+from .file_utils import read_json_file, get_json_files_in_directory, increment_json_field
 from .logging_setup import logger
 from .ollama_client import process_prompt
-from .kb_graph import get_related_nodes, get_db_connection
+from .kb_graph import get_neighbourhoods, get_db_connection
+
+# Graph re-ranking: dense candidates fetched per requested result, weight of the
+# PageRank score in the final blend, neighbours kept per candidate, and the
+# latency budget for the neighbourhood fetch.
+RERANK_CANDIDATE_FACTOR = 3
+RERANK_GRAPH_WEIGHT = 0.3
+RERANK_MAX_NEIGHBOURS = 10
+RERANK_BUDGET_MS = 50.0
+
+last_rerank_timing: Dict[str, float] = {}
 
 def read_memory(filename: str) -> Dict[str, Any]:
     file_path = DATA_DIR / filename
@@ -23,46 +38,223 @@ def read_memory(filename: str) -> Dict[str, Any]:
         logger.error(f"Error reading memory file {filename}: {str(e)}")
         return {}
 
-def save_embeddings(filename: str, embeddings: List[float]) -> None:
+# Embedding index layout:
+#   EMBEDDINGS_DIR/<filename>.json                 legacy, un-versioned generation
+#   EMBEDDINGS_DIR/generations/<name>/<filename>.json
+#   EMBEDDINGS_DIR/CURRENT                         pointer to the generation served to queries
+#   EMBEDDINGS_DIR/PENDING                         pointer to a generation being built in the background
+GENERATIONS_DIR = 'generations'
+CURRENT_POINTER = 'CURRENT'
+PENDING_POINTER = 'PENDING'
+
+_active_generation_cache: Dict[str, Any] = {"mtime_ns": None, "generation": None}
+
+def _atomic_write_json(path: Path, data: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def generation_name_for_model(model: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', model)
+
+def generation_dir(generation: Optional[str]) -> Path:
+    if generation is None:
+        return EMBEDDINGS_DIR
+    return EMBEDDINGS_DIR / GENERATIONS_DIR / generation
+
+def get_active_generation() -> Dict[str, Any]:
+    """Return the generation currently served to queries.
+
+    On first use the legacy flat layout is pinned to EMBEDDING_MODEL by writing
+    the CURRENT pointer, so later config changes only take effect through
+    reembed_memories. The pointer is re-read only when it changes.
+    """
+    pointer = EMBEDDINGS_DIR / CURRENT_POINTER
+    try:
+        mtime_ns = pointer.stat().st_mtime_ns
+    except FileNotFoundError:
+        legacy = {"generation": None, "model": EMBEDDING_MODEL, "dimension": None}
+        try:
+            _atomic_write_json(pointer, legacy)
+        except Exception as e:
+            logger.error(f"Error pinning legacy embedding generation: {str(e)}")
+        return legacy
+    if _active_generation_cache["mtime_ns"] != mtime_ns:
+        try:
+            _active_generation_cache["generation"] = read_json_file(pointer)
+            _active_generation_cache["mtime_ns"] = mtime_ns
+        except Exception as e:
+            logger.error(f"Error reading active embedding generation: {str(e)}")
+            return {"generation": None, "model": EMBEDDING_MODEL, "dimension": None}
+    return _active_generation_cache["generation"]
+
+def save_embeddings(filename: str, embeddings: List[float], model: Optional[str] = None,
+                    generation: Optional[str] = None) -> None:
+    if model is None:
+        active = get_active_generation()
+        model, generation = active["model"], active["generation"]
+    record = {"model": model, "dimension": len(embeddings), "embedding": embeddings}
     try:
-        write_json_file(EMBEDDINGS_DIR / f"{filename}.json", embeddings)
-        logger.info(f"Saved embeddings for file: {filename}")
+        _atomic_write_json(generation_dir(generation) / f"{filename}.json", record)
+        logger.info(f"Saved embeddings for file: {filename} (model: {model})")
     except Exception as e:
         logger.error(f"Error saving embeddings for file {filename}: {str(e)}")
 
-def load_embeddings(filename: str) -> List[float]:
-    embeddings_file = EMBEDDINGS_DIR / f"{filename}.json"
+def load_embeddings(filename: str, model: Optional[str] = None, generation: Optional[str] = None,
+                    dimension: Optional[int] = None) -> List[float]:
+    """Load stored embeddings, returning [] unless they were produced by `model`.
+
+    Defaults to the active generation. Vectors from another model or dimension
+    are treated as missing so vector spaces never mix. Untagged files predate
+    versioning and are only trusted in the legacy flat layout.
+    """
+    if model is None:
+        active = get_active_generation()
+        model, generation, dimension = active["model"], active["generation"], active.get("dimension")
+    embeddings_file = generation_dir(generation) / f"{filename}.json"
     if not embeddings_file.exists():
         logger.debug(f"No existing embeddings found for file: {filename}")
         return []
     try:
-        return read_json_file(embeddings_file)
+        record = read_json_file(embeddings_file)
     except Exception as e:
         logger.error(f"Error loading embeddings for file {filename}: {str(e)}")
         return []
+    if isinstance(record, list):
+        if generation is None:
+            return record
+        logger.debug(f"Untagged embeddings for file {filename} ignored for model {model}")
+        return []
+    if record.get("model") != model:
+        logger.debug(f"Stale embeddings for file {filename}: expected model {model}")
+        return []
+    if dimension is not None and record.get("dimension") != dimension:
+        logger.debug(f"Stale embeddings for file {filename}: expected dimension {dimension}")
+        return []
+    return record["embedding"]
 
-def get_embeddings(filename: str) -> List[float]:
-    if embeddings := load_embeddings(filename):
-        return embeddings
-    memory_data = read_memory(filename)
+def memory_text(memory_data: Dict[str, Any]) -> str:
     if 'type' not in memory_data:
-        text = str(memory_data)
+        return str(memory_data)
     elif memory_data['type'] == 'interaction':
         if isinstance(memory_data['content'], dict) and 'prompt' in memory_data['content'] and 'response' in memory_data['content']:
-            text = f"{memory_data['content']['prompt']}\n{memory_data['content']['response']}"
-        else:
-            text = str(memory_data['content'])
+            return f"{memory_data['content']['prompt']}\n{memory_data['content']['response']}"
+        return str(memory_data['content'])
     else:  # document_chunk or any other type
-        text = str(memory_data['content'])
+        return str(memory_data['content'])
+
+def get_embeddings(filename: str, active: Optional[Dict[str, Any]] = None) -> List[float]:
+    """Stored or freshly generated embeddings of a memory in the `active`
+    generation (default: the one currently served)."""
+    active = active or get_active_generation()
+    if embeddings := load_embeddings(filename, active["model"], active["generation"], active.get("dimension")):
+        return embeddings
+    text = memory_text(read_memory(filename))
     try:
-        embeddings = ollama.embeddings(model=EMBEDDING_MODEL, prompt=text)["embedding"]
-        save_embeddings(filename, embeddings)
+        embeddings = ollama.embeddings(model=active["model"], prompt=text)["embedding"]
+        save_embeddings(filename, embeddings, model=active["model"], generation=active["generation"])
         logger.info(f"Generated new embeddings for file: {filename}")
         return embeddings
     except Exception as e:
         logger.error(f"Error generating embeddings for file {filename}: {str(e)}")
         return []
 
+def reembed_memories(model: str = None, generation: Optional[str] = None, max_per_second: float = 5.0,
+                     stop_event: Optional[threading.Event] = None) -> bool:
+    """Build a new embedding generation for `model` and swap it in atomically.
+
+    Queries keep using the active generation until the swap. Progress is the set
+    of files already written to the new generation, so re-running after a crash
+    resumes where it stopped. Memories that cannot be read or embedded, or whose
+    vector does not match the generation's dimension, are skipped and embedded
+    lazily by get_embeddings after the swap. Returns True
+    once the new generation is active.
+    """
+    model = model or EMBEDDING_MODEL
+    generation = generation or generation_name_for_model(model)
+    pending = {"generation": generation, "model": model}
+    _atomic_write_json(EMBEDDINGS_DIR / PENDING_POINTER, pending)
+    logger.info(f"Re-embedding memories into generation {generation} with model {model}")
+
+    min_interval = 1.0 / max_per_second if max_per_second else 0.0
+    dimension = None
+    done, skipped = set(), set()
+    while True:
+        # Loop until a full pass finds nothing new, so memories written
+        # during the rebuild are not lost at swap time.
+        todo = [f.name for f in get_json_files_in_directory(DATA_DIR) if f.name not in done | skipped]
+        if not todo:
+            break
+        for filename in todo:
+            if stop_event is not None and stop_event.is_set():
+                logger.info(f"Re-embedding into generation {generation} interrupted; progress kept")
+                return False
+            embeddings = load_embeddings(filename, model=model, generation=generation)
+            if not embeddings:
+                started = time.monotonic()
+                try:
+                    text = memory_text(read_json_file(DATA_DIR / filename))
+                    embeddings = ollama.embeddings(model=model, prompt=text)["embedding"]
+                except Exception as e:
+                    logger.error(f"Error re-embedding file {filename}, skipping it: {str(e)}")
+                    skipped.add(filename)
+                    continue
+                save_embeddings(filename, embeddings, model=model, generation=generation)
+                elapsed = time.monotonic() - started
+                if elapsed < min_interval:
+                    time.sleep(min_interval - elapsed)
+            if dimension is None:
+                dimension = len(embeddings)
+            elif len(embeddings) != dimension:
+                logger.error(f"Dimension mismatch in generation {generation}: {filename} has {len(embeddings)}, "
+                             f"expected {dimension}; skipping it")
+                skipped.add(filename)
+                continue
+            done.add(filename)
+
+    _atomic_write_json(EMBEDDINGS_DIR / CURRENT_POINTER,
+                       {"generation": generation, "model": model, "dimension": dimension})
+    os.remove(EMBEDDINGS_DIR / PENDING_POINTER)
+    logger.info(f"Activated embedding generation {generation} ({len(done)} files, {len(skipped)} skipped, "
+                f"dimension {dimension})")
+    return True
+
+def start_background_reembedding(model: str = None, max_per_second: float = 5.0) -> Tuple[threading.Thread, threading.Event]:
+    """Run reembed_memories in a daemon thread; set the returned event to stop it."""
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=reembed_memories,
+        kwargs={"model": model, "max_per_second": max_per_second, "stop_event": stop_event},
+        name="reembed-memories",
+        daemon=True,
+    )
+    thread.start()
+    return thread, stop_event
+
+def resume_pending_reembedding() -> Optional[Tuple[threading.Thread, threading.Event]]:
+    """Restart a background re-embedding that was interrupted, if any."""
+    pointer = EMBEDDINGS_DIR / PENDING_POINTER
+    if not pointer.exists():
+        return None
+    pending = read_json_file(pointer)
+    logger.info(f"Resuming re-embedding into generation {pending['generation']}")
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=reembed_memories,
+        kwargs={"model": pending["model"], "generation": pending["generation"], "stop_event": stop_event},
+        name="reembed-memories",
+        daemon=True,
+    )
+    thread.start()
+    return thread, stop_event
+
 def find_most_similar(needle: List[float], haystack: List[List[float]]) -> List[Tuple[float, int]]:
     try:
         needle_norm = norm(needle)
@@ -74,62 +266,156 @@ def find_most_similar(needle: List[float], haystack: List[List[float]]) -> List[
         logger.error(f"Error in finding most similar embeddings: {str(e)}")
         return []
 
-def search_memories(query: str, top_k: int = 5, similarity_threshold: float = 0.0) -> List[Dict[str, Any]]:
+def personalized_pagerank(seeds: Dict[str, float], neighbourhoods: Dict[str, List[Tuple[str, str, float]]],
+                          damping: float = 0.85, max_iter: int = 20, tol: float = 1e-6) -> Dict[str, float]:
+    """Personalized PageRank over the small subgraph around the seed nodes.
+
+    Edges are treated as undirected and weighted by strength; the restart
+    distribution is proportional to the seed scores.
+    """
+    nodes = list(seeds)
+    for edges in neighbourhoods.values():
+        nodes.extend(neighbour for neighbour, _, _ in edges)
+    index = {node: i for i, node in enumerate(dict.fromkeys(nodes))}
+    n = len(index)
+    if n == 0:
+        return {}
+
+    weights = np.zeros((n, n))
+    for node_id, edges in neighbourhoods.items():
+        for neighbour, _, strength in edges:
+            i, j = index[node_id], index[neighbour]
+            weights[i, j] = weights[j, i] = max(weights[i, j], strength)
+
+    restart = np.zeros(n)
+    for node_id, score in seeds.items():
+        restart[index[node_id]] = max(score, 0.0)
+    restart = restart / restart.sum() if restart.sum() > 0 else np.full(n, 1.0 / n)
+
+    out_weight = weights.sum(axis=1)
+    dangling = out_weight == 0
+    transition = np.divide(weights, out_weight[:, None], out=np.zeros_like(weights), where=~dangling[:, None])
+
+    rank = restart.copy()
+    for _ in range(max_iter):
+        new_rank = damping * (transition.T @ rank + rank[dangling].sum() * restart) + (1 - damping) * restart
+        converged = np.abs(new_rank - rank).sum() < tol
+        rank = new_rank
+        if converged:
+            break
+    return {node: float(rank[i]) for node, i in index.items()}
+
+def rerank_with_graph(candidates: List[Tuple[str, float]], memory_files: Optional[Set[str]] = None,
+                      similarity_threshold: float = 0.0, graph_weight: float = RERANK_GRAPH_WEIGHT,
+                      max_neighbours: int = RERANK_MAX_NEIGHBOURS,
+                      budget_ms: float = RERANK_BUDGET_MS) -> List[Dict[str, Any]]:
+    """Re-rank (filename, similarity) candidates using their edge neighbourhoods.
+
+    The final score blends cosine similarity with personalized PageRank seeded
+    by the candidates, so memories connected to several strong hits move up and
+    strongly linked neighbours can enter the results. Neighbours only enter if
+    they are memory files (names in memory_files) and their linking edge meets
+    similarity_threshold; other nodes, e.g. concepts, only feed PageRank. If the
+    neighbourhood fetch fails or is interrupted at budget_ms the dense order is
+    returned unchanged. Timings of the last call are kept in last_rerank_timing.
+    """
+    started = time.perf_counter()
+    dense = [{"filename": filename, "similarity": similarity, "score": similarity, "source": "embedding"}
+             for filename, similarity in candidates]
+    last_rerank_timing.clear()
+    if not candidates:
+        return dense
+
+    seeds = {Path(filename).stem: similarity for filename, similarity in candidates}
+    try:
+        neighbourhoods = get_neighbourhoods(list(seeds), max_neighbours=max_neighbours, budget_ms=budget_ms)
+    except TimeoutError as e:
+        last_rerank_timing["fetch_ms"] = (time.perf_counter() - started) * 1000
+        logger.warning(f"Skipping graph re-ranking: {str(e)}")
+        return dense
+    except Exception as e:
+        logger.error(f"Error fetching edge neighbourhoods: {str(e)}")
+        return dense
+    fetch_ms = (time.perf_counter() - started) * 1000
+    last_rerank_timing["fetch_ms"] = fetch_ms
+
+    ranks = personalized_pagerank(seeds, neighbourhoods)
+    max_rank = max(ranks.values(), default=0.0) or 1.0
+
+    results = []
+    for result in dense:
+        node_id = Path(result["filename"]).stem
+        result["score"] = (1 - graph_weight) * result["similarity"] + graph_weight * ranks.get(node_id, 0.0) / max_rank
+        results.append(result)
+
+    # Neighbours that are not dense hits keep the strongest linking edge,
+    # using its strength as a proxy for similarity.
+    memory_files = memory_files or set()
+    links = {}
+    for edges in neighbourhoods.values():
+        for neighbour, relationship_type, strength in edges:
+            if (neighbour not in seeds and f"{neighbour}.json" in memory_files
+                    and strength >= similarity_threshold and strength > links.get(neighbour, ("", -1.0))[1]):
+                links[neighbour] = (relationship_type, strength)
+    for node_id, (relationship_type, strength) in links.items():
+        results.append({
+            "filename": f"{node_id}.json",
+            "similarity": strength,
+            "score": graph_weight * ranks[node_id] / max_rank,
+            "source": "edge",
+            "relationship": relationship_type
+        })
+
+    results.sort(key=lambda x: x["score"], reverse=True)
+    last_rerank_timing["total_ms"] = (time.perf_counter() - started) * 1000
+    logger.info(f"Graph re-ranking of {len(candidates)} candidates took {last_rerank_timing['total_ms']:.1f} ms "
+                f"(fetch {fetch_ms:.1f} ms)")
+    return results
+
+def search_memories(query: str, top_k: int = 5, similarity_threshold: float = 0.0,
+                    graph_rerank: bool = True) -> List[Dict[str, Any]]:
     logger.info(f"Searching memories for query: {query[:50]}...")  # Log only first 50 characters
 
-    # Embedding-based search
+    # Embedding-based search. The served generation is read once so a swap by
+    # reembed_memories mid-search cannot mix vector spaces; its model differs
+    # from EMBEDDING_MODEL while a re-embedding is in progress.
+    active = get_active_generation()
     memory_files = get_json_files_in_directory(DATA_DIR)
-    embeddings = [get_embeddings(f.name) for f in memory_files]
+    embeddings = [get_embeddings(f.name, active) for f in memory_files]
     try:
-        query_embedding = ollama.embeddings(model=EMBEDDING_MODEL, prompt=query)["embedding"]
+        query_embedding = ollama.embeddings(model=active["model"], prompt=query)["embedding"]
         most_similar_files = find_most_similar(query_embedding, embeddings)
     except Exception as e:
         logger.error(f"Error generating query embedding: {str(e)}")
         most_similar_files = []
 
-    relevant_memories = []
+    candidates = []
     for similarity, index in most_similar_files:
         if similarity < similarity_threshold:
             break
-        if len(relevant_memories) >= top_k:
+        if len(candidates) >= (top_k * RERANK_CANDIDATE_FACTOR if graph_rerank else top_k):
             break
-        filename = memory_files[index].name
-        memory_data = read_memory(filename)
-
-        relevant_memories.append({
-            "content": memory_data.get("content", ""),
-            "type": memory_data.get("type", "unknown"),
-            "similarity": similarity,
-            "timestamp": memory_data.get("timestamp", ""),
-            "access_count": memory_data.get("access_count", 0),
-            "permanent_marker": memory_data.get("permanent_marker", 0),
-            "filename": filename,
-            "source": "embedding"
-        })
+        candidates.append((memory_files[index].name, similarity))
 
-    # Edge-based search
-    query_id = hash(query)  # Using a simple hash for demonstration; you might want a more robust method
-    edge_results = get_related_nodes(str(query_id))
+    # Graph-aware re-ranking of the dense candidates
+    if graph_rerank:
+        ranked = rerank_with_graph(candidates, {f.name for f in memory_files}, similarity_threshold)[:top_k]
+    else:
+        ranked = [{"filename": filename, "similarity": similarity, "score": similarity, "source": "embedding"}
+                  for filename, similarity in candidates]
 
-    for node_id, relationship_type, strength in edge_results:
-        if len(relevant_memories) >= top_k * 2:  # Allowing more results to combine later
-            break
-        memory_data = read_memory(f"{node_id}.json")
-        relevant_memories.append({
+    combined_results = []
+    for result in ranked:
+        memory_data = read_memory(result["filename"])
+        combined_results.append({
             "content": memory_data.get("content", ""),
             "type": memory_data.get("type", "unknown"),
-            "similarity": strength,  # Using edge strength as a proxy for similarity
             "timestamp": memory_data.get("timestamp", ""),
             "access_count": memory_data.get("access_count", 0),
             "permanent_marker": memory_data.get("permanent_marker", 0),
-            "filename": f"{node_id}.json",
-            "source": "edge",
-            "relationship": relationship_type
+            **result
         })
 
-    # Combine and rank results
-    combined_results = sorted(relevant_memories, key=lambda x: x['similarity'], reverse=True)[:top_k]
-
     logger.info(f"Found {len(combined_results)} relevant memories")
     for result in combined_results:
         content = result.get('content', '')
@@ -0,0 +1,38 @@
+# tests/conftest.py
+"""Stand-ins for the host application modules the packages import.
+
+The packages were split out of the Ollama Agents application, which provides
+`config`, `src.modules.*` and helper modules next to each package. The
+benchmarks' host_app registers them before `src` is imported so the suite
+runs on its own.
+"""
+
+import atexit
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+import host_app  # noqa: E402
+
+_workdir = Path(tempfile.mkdtemp(prefix='ollama-agents-tests-'))
+atexit.register(shutil.rmtree, _workdir, ignore_errors=True)
+(_workdir / 'data').mkdir()
+(_workdir / 'embeddings').mkdir()
+host_app.install(_workdir / 'data', _workdir / 'embeddings', 'test-embed', prefix='src.')
+
+# The tests address the modules by their application names
+import src  # noqa: E402
+from src.kb_graph import graph_operations  # noqa: E402
+from src.knowledge_extraction import extractor  # noqa: E402
+from src.memory_search import search  # noqa: E402
+
+src.modules = sys.modules['src.modules']
+for name, module in (('kb_graph', graph_operations), ('knowledge_extraction', extractor),
+                     ('memory_search', search)):
+    sys.modules[f'src.modules.{name}'] = module
+    setattr(src.modules, name, module)
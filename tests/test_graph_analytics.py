@@ -0,0 +1,87 @@
+import unittest
+import sqlite3
+from unittest.mock import patch
+from src.kb_graph.schema import SCHEMA
+from src.kb_graph.graph_operations import close_edge
+from src.kb_graph.analytics import (
+    load_adjacency, pagerank, weak_components, run_graph_analytics,
+    get_node_attributes, get_node_importance
+)
+
+class TestGraphAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.executescript(SCHEMA)
+        self.conn.executemany('''
+            INSERT INTO edges (source_id, target_id, relationship_type, strength)
+            VALUES (?, ?, ?, ?)
+        ''', [
+            ("A", "B", "RELATED_TO", 1.0),
+            ("B", "C", "RELATED_TO", 1.0),
+            ("C", "A", "RELATED_TO", 1.0),
+            ("D", "C", "RELATED_TO", 1.0),
+            ("E", "F", "PART_OF", 0.5)
+        ])
+        self.conn.commit()
+        patcher = patch('src.kb_graph.analytics.get_db_connection', return_value=self.conn)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_pagerank(self):
+        node_ids, matrix = load_adjacency(self.conn)
+        ranks, _ = pagerank(matrix)
+        ranks = dict(zip(node_ids, ranks))
+        self.assertAlmostEqual(sum(ranks.values()), 1.0, places=6)
+        self.assertGreater(ranks["C"], ranks["B"])
+        self.assertGreater(ranks["F"], ranks["E"])
+
+    def test_weak_components(self):
+        node_ids, matrix = load_adjacency(self.conn)
+        components = dict(zip(node_ids, weak_components(matrix, node_ids)))
+        self.assertEqual({components[n] for n in "ABCD"}, {"A"})
+        self.assertEqual(components["F"], "E")
+
+    def test_run_graph_analytics(self):
+        summary = run_graph_analytics()
+        self.assertEqual(summary["nodes"], 6)
+        self.assertEqual(summary["components"], 2)
+        attributes = get_node_attributes("C")
+        self.assertEqual(attributes["degree"], "3")
+        self.assertEqual(attributes["in_degree"], "2")
+        self.assertEqual(attributes["component"], "A")
+        self.assertEqual(set(get_node_importance(["A", "F", "missing"])), {"A", "F"})
+
+    def test_load_adjacency_uses_current_edges(self):
+        self.conn.execute("UPDATE edges SET end_time = '2023-01-01 00:00:00' WHERE source_id = 'D'")
+        self.conn.execute("UPDATE edges SET bidirectional = 1 WHERE source_id = 'E'")
+        node_ids, matrix = load_adjacency(self.conn)
+        self.assertNotIn("D", node_ids)
+        self.assertEqual(matrix.nnz, 5)
+
+    def test_run_graph_analytics_incremental(self):
+        run_graph_analytics()
+        self.assertTrue(run_graph_analytics()["skipped"])
+
+        self.conn.execute("DELETE FROM edges WHERE source_id = 'E'")
+        self.conn.commit()
+        summary = run_graph_analytics()
+        self.assertFalse(summary["skipped"])
+        self.assertEqual(summary["stale_nodes"], 2)
+        self.assertEqual(get_node_attributes("E"), {})
+
+    def test_run_graph_analytics_sees_closed_edge(self):
+        run_graph_analytics()
+        self.assertEqual(get_node_attributes("F")["in_degree"], "1")
+        # Closing an edge changes neither the row count nor the max id, and
+        # happens within the same second as the previous run
+        with patch('src.kb_graph.graph_operations.get_db_connection', return_value=self.conn):
+            self.assertTrue(close_edge("E", "F", "PART_OF"))
+        self.assertFalse(run_graph_analytics()["skipped"])
+        self.assertEqual(get_node_attributes("F"), {})
+        self.assertTrue(run_graph_analytics()["skipped"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import sqlite3
+from unittest.mock import patch
+from src.kb_graph.schema import SCHEMA
+from src.kb_graph.hierarchy import (
+    add_hierarchy, add_hierarchy_bulk, ancestors, descendants, subtree, rebuild_hierarchy_closure
+)
+
+class TestHierarchy(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.executescript(SCHEMA)
+        patcher = patch('src.kb_graph.hierarchy.get_db_connection', return_value=self.conn)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Children listed before parents to exercise the topological ordering
+        add_hierarchy_bulk([
+            ("python", "numpy"),
+            ("language", "python"),
+            ("language", "rust"),
+            ("python", "django"),
+            ("thing", "language")
+        ], "IS_A")
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_ancestors(self):
+        self.assertEqual(ancestors("numpy", "IS_A"), [("python", 1), ("language", 2), ("thing", 3)])
+        self.assertEqual(ancestors("numpy", "IS_A", max_depth=1), [("python", 1)])
+        self.assertEqual(ancestors("thing", "IS_A"), [])
+        self.assertEqual(ancestors("numpy", "PART_OF"), [])
+
+    def test_descendants(self):
+        self.assertEqual(descendants("language", "IS_A"),
+                         [("python", 1), ("rust", 1), ("django", 2), ("numpy", 2)])
+        self.assertEqual(len(descendants("thing", "IS_A", max_depth=2)), 3)
+
+    def test_subtree(self):
+        self.assertEqual(subtree("python", "IS_A"), [("python", "django"), ("python", "numpy")])
+        self.assertEqual(len(subtree("thing", "IS_A")), 5)
+
+    def test_multiple_parents_keep_shortest_depth(self):
+        self.assertTrue(add_hierarchy("thing", "numpy", "IS_A"))
+        self.assertIn(("thing", 1), ancestors("numpy", "IS_A"))
+        self.assertFalse(add_hierarchy("thing", "numpy", "IS_A"))
+        self.assertNotIn(("thing", "numpy"), subtree("python", "IS_A"))
+
+    def test_cycles_are_rejected(self):
+        with self.assertRaises(ValueError):
+            add_hierarchy("numpy", "thing", "IS_A")
+        with self.assertRaises(ValueError):
+            add_hierarchy_bulk([("a", "b"), ("b", "a")], "IS_A")
+        self.assertEqual(ancestors("thing", "IS_A"), [])
+
+    def test_rebuild_hierarchy_closure(self):
+        before = descendants("thing", "IS_A")
+        self.conn.execute("DELETE FROM hierarchy_closure")
+        rebuild_hierarchy_closure()
+        self.assertEqual(descendants("thing", "IS_A"), before)
+
+if __name__ == '__main__':
+    unittest.main()
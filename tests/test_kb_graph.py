@@ -5,25 +5,18 @@ import sqlite3
 from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 import logging
+from src.kb_graph.schema import SCHEMA
 from src.modules.kb_graph import (
-    create_edge, update_knowledge_graph, extract_key_concepts,
-    get_related_nodes, analyze_file_pair, compare_content, compare_tags,
-    compare_titles, compare_timestamps
+    create_edge, close_edge, update_knowledge_graph, extract_key_concepts,
+    get_related_nodes, get_edges_in_window, migrate_edges_table, analyze_file_pair, compare_content, compare_tags,
+    compare_titles, compare_timestamps, get_neighbourhoods, invalidate_neighbourhoods
 )
+from src.modules import kb_graph
 
 class TestKBGraph(unittest.TestCase):
     def setUp(self):
         self.conn = sqlite3.connect(':memory:')
-        self.conn.execute('''
-            CREATE TABLE edges (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                source_id TEXT NOT NULL,
-                target_id TEXT NOT NULL,
-                relationship_type TEXT NOT NULL,
-                strength REAL NOT NULL
-            )
-        ''')
-        self.conn.commit()
+        self.conn.executescript(SCHEMA)
         logging.basicConfig(level=logging.DEBUG)
 
     def tearDown(self):
@@ -59,6 +52,159 @@ class TestKBGraph(unittest.TestCase):
         self.assertIn(("B", "RELATED_TO", 0.8), related)
         self.assertIn(("C", "PART_OF", 0.9), related)
 
+    @patch('src.modules.kb_graph.get_db_connection')
+    def test_get_related_nodes_bidirectional(self, mock_get_db_connection):
+        mock_get_db_connection.return_value = self.conn
+        create_edge("A", "B", "RELATED_TO", 0.8, bidirectional=True)
+        create_edge("C", "B", "PART_OF", 0.9)
+        self.assertEqual(get_related_nodes("B"), [("A", "RELATED_TO", 0.8)])
+        self.assertEqual(get_related_nodes("C"), [("B", "PART_OF", 0.9)])
+
+    @patch('src.modules.kb_graph.get_db_connection')
+    def test_create_edge_keeps_history(self, mock_get_db_connection):
+        mock_get_db_connection.return_value = self.conn
+        create_edge("A", "B", "RELATED_TO", 0.8, valid_from="2023-01-01T00:00:00")
+        create_edge("A", "B", "RELATED_TO", 0.8, valid_from="2023-02-01T00:00:00")
+        create_edge("A", "B", "RELATED_TO", 0.5, valid_from="2023-03-01T00:00:00")
+        create_edge("A", "C", "PART_OF", 0.9, valid_from="2023-02-01T00:00:00")
+        close_edge("A", "C", "PART_OF", valid_to="2023-04-01T00:00:00")
+
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0], 3)
+        self.assertEqual(get_related_nodes("A"), [("B", "RELATED_TO", 0.5)])
+        self.assertEqual(get_related_nodes("A", as_of="2022-12-01T00:00:00"), [])
+        self.assertEqual(sorted(get_related_nodes("A", as_of="2023-02-15T00:00:00")),
+                         [("B", "RELATED_TO", 0.8), ("C", "PART_OF", 0.9)])
+        self.assertEqual(get_related_nodes("A", "PART_OF", as_of="2023-03-15T00:00:00"), [("C", "PART_OF", 0.9)])
+
+        window = get_edges_in_window("A", "2023-02-15T00:00:00", "2023-03-15T00:00:00", "RELATED_TO")
+        self.assertEqual([strength for _, _, strength, _, _ in window], [0.8, 0.5])
+        self.assertIsNone(window[-1][4])
+
+    @patch('src.modules.kb_graph.get_db_connection')
+    def test_create_edge_rejects_earlier_version(self, mock_get_db_connection):
+        mock_get_db_connection.return_value = self.conn
+        create_edge("A", "B", "RELATED_TO", 0.8, valid_from="2023-03-01T00:00:00")
+        with self.assertRaises(ValueError):
+            create_edge("A", "B", "RELATED_TO", 0.5, valid_from="2023-02-01T00:00:00")
+        with self.assertRaises(ValueError):
+            close_edge("A", "B", "RELATED_TO", valid_to="2023-02-01T00:00:00")
+        self.assertEqual(get_related_nodes("A"), [("B", "RELATED_TO", 0.8)])
+
+    @patch('src.modules.kb_graph.get_db_connection')
+    def test_get_related_nodes_reciprocal_edges(self, mock_get_db_connection):
+        mock_get_db_connection.return_value = self.conn
+        create_edge("A", "B", "RELATED_TO", 1.0, bidirectional=True)
+        create_edge("B", "A", "RELATED_TO", 1.0, bidirectional=True)
+        self.assertEqual(get_related_nodes("A"), [("B", "RELATED_TO", 1.0)])
+        self.assertEqual(get_related_nodes("A", as_of=datetime.now() + timedelta(days=1)), [("B", "RELATED_TO", 1.0)])
+
+    def legacy_connection(self):
+        conn = sqlite3.connect(':memory:')
+        self.addCleanup(conn.close)
+        conn.executescript('''
+            CREATE TABLE edges (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source_id TEXT NOT NULL,
+                target_id TEXT NOT NULL,
+                relationship_type TEXT NOT NULL,
+                strength REAL NOT NULL,
+                confidence REAL NOT NULL DEFAULT 1.0,
+                bidirectional BOOLEAN DEFAULT FALSE,
+                start_time TIMESTAMP,
+                end_time TIMESTAMP,
+                metadata JSON,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(source_id, target_id, relationship_type)
+            );
+            INSERT INTO edges (source_id, target_id, relationship_type, strength) VALUES ('A', 'B', 'RELATED_TO', 0.8);
+        ''')
+        return conn
+
+    @patch('src.modules.kb_graph.get_db_connection')
+    def test_migrate_edges_table(self, mock_get_db_connection):
+        conn = self.legacy_connection()
+        mock_get_db_connection.return_value = conn
+        migrate_edges_table()
+        self.assertEqual(get_related_nodes("A"), [("B", "RELATED_TO", 0.8)])
+        self.assertEqual(get_related_nodes("B"), [("A", "RELATED_TO", 0.8)])
+
+        # Callers using the old signature neither add a version nor drop the reverse direction
+        create_edge("A", "B", "RELATED_TO", 0.8)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0], 1)
+        self.assertEqual(get_related_nodes("B"), [("A", "RELATED_TO", 0.8)])
+
+        create_edge("A", "B", "RELATED_TO", 0.5)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0], 2)
+        self.assertEqual(get_related_nodes("B"), [("A", "RELATED_TO", 0.5)])
+
+    @patch('src.modules.kb_graph._versioned_databases', set())
+    @patch('src.modules.kb_graph.get_db_connection')
+    def test_create_edge_migrates_legacy_table(self, mock_get_db_connection):
+        conn = self.legacy_connection()
+        conn.executescript(SCHEMA)
+        mock_get_db_connection.return_value = conn
+        create_edge("A", "B", "RELATED_TO", 0.5)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0], 2)
+        self.assertEqual(get_related_nodes("A"), [("B", "RELATED_TO", 0.5)])
+        self.assertEqual(get_related_nodes("B"), [("A", "RELATED_TO", 0.5)])
+
+    @patch('src.modules.kb_graph.get_db_connection')
+    def test_get_neighbourhoods(self, mock_get_db_connection):
+        mock_get_db_connection.return_value = self.conn
+        invalidate_neighbourhoods()
+        create_edge("A", "B", "RELATED_TO", 0.8)
+        create_edge("C", "A", "PART_OF", 0.9, bidirectional=True)
+        neighbourhoods = get_neighbourhoods(["A", "B", "D"])
+        self.assertEqual(sorted(neighbourhoods["A"]), sorted(get_related_nodes("A")))
+        self.assertEqual(neighbourhoods["B"], [])
+        self.assertEqual(neighbourhoods["D"], [])
+        self.assertEqual(get_neighbourhoods(["A"], "PART_OF")["A"], [("C", "PART_OF", 0.9)])
+
+        create_edge("B", "D", "RELATED_TO", 0.5)
+        self.assertIn(("D", "RELATED_TO", 0.5), get_neighbourhoods(["B"])["B"])
+        close_edge("B", "D", "RELATED_TO")
+        self.assertEqual(get_neighbourhoods(["B"])["B"], [])
+
+    @patch('src.modules.kb_graph.get_db_connection')
+    def test_get_neighbourhoods_keeps_strongest_edges(self, mock_get_db_connection):
+        mock_get_db_connection.return_value = self.conn
+        invalidate_neighbourhoods()
+        self.conn.executemany('''
+            INSERT INTO edges (source_id, target_id, relationship_type, strength, bidirectional)
+            VALUES (?, ?, 'RELATED_TO', ?, ?)
+        ''', [("hub", f"n{i}", i / 100, 0) for i in range(50)] + [(f"m{i}", "hub", 0.9 + i / 1000, 1) for i in range(3)])
+        edges = get_neighbourhoods(["hub"], max_neighbours=5)["hub"]
+        self.assertEqual([neighbour for neighbour, _, _ in edges], ["m2", "m1", "m0", "n49", "n48"])
+
+    @patch('src.modules.kb_graph.get_db_connection')
+    def test_get_neighbourhoods_budget(self, mock_get_db_connection):
+        mock_get_db_connection.return_value = self.conn
+        invalidate_neighbourhoods()
+        self.conn.executemany('''
+            INSERT INTO edges (source_id, target_id, relationship_type, strength)
+            VALUES ('hub', ?, 'RELATED_TO', 0.5)
+        ''', [(f"n{i}",) for i in range(5000)])
+        self.conn.commit()
+        with self.assertRaises(TimeoutError):
+            get_neighbourhoods(["hub"], budget_ms=0)
+        self.assertEqual(len(get_neighbourhoods(["hub"], budget_ms=10000)["hub"]), 10)
+
+    @patch('src.modules.kb_graph.get_db_connection')
+    def test_get_neighbourhoods_not_cached_after_concurrent_invalidation(self, mock_get_db_connection):
+        mock_get_db_connection.return_value = self.conn
+        invalidate_neighbourhoods()
+        fetch = kb_graph._fetch_neighbourhoods
+
+        def fetch_racing_with_create_edge(*args):
+            fetched = fetch(*args)
+            create_edge("A", "B", "RELATED_TO", 0.8)
+            return fetched
+
+        with patch('src.modules.kb_graph._fetch_neighbourhoods', side_effect=fetch_racing_with_create_edge):
+            self.assertEqual(get_neighbourhoods(["A"])["A"], [])
+        self.assertEqual(get_neighbourhoods(["A"])["A"], [("B", "RELATED_TO", 0.8)])
+
     @patch('src.modules.kb_graph.compare_content')
     @patch('src.modules.kb_graph.compare_tags')
     @patch('src.modules.kb_graph.compare_titles')
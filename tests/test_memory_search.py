@@ -1,6 +1,14 @@
+import json
+import tempfile
+import threading
 import unittest
+from pathlib import Path
 from unittest.mock import patch, MagicMock
-from src.modules.memory_search import search_memories, get_embeddings, find_most_similar
+from src.modules.memory_search import (
+    search_memories, get_embeddings, find_most_similar, load_embeddings, save_embeddings,
+    get_active_generation, reembed_memories, resume_pending_reembedding,
+    personalized_pagerank, rerank_with_graph
+)
 
 class TestMemorySearch(unittest.TestCase):
     @patch('src.modules.memory_search.get_json_files_in_directory')
@@ -30,5 +38,147 @@ class TestMemorySearch(unittest.TestCase):
         self.assertAlmostEqual(results[0][0], 0.8164965809277259, places=7)
         self.assertEqual(results[0][1], 2)  # Index of [1, 1, 1]
 
+    @patch('src.modules.memory_search.get_active_generation')
+    def test_load_embeddings_rejects_other_model(self, mock_active):
+        with tempfile.TemporaryDirectory() as tmp, patch('src.modules.memory_search.EMBEDDINGS_DIR', Path(tmp)):
+            mock_active.return_value = {"generation": None, "model": "old-model", "dimension": 3}
+            save_embeddings("file1.json", [1.0, 0.0, 0.0])
+            record = json.loads((Path(tmp) / "file1.json.json").read_text())
+            self.assertEqual(record["model"], "old-model")
+            self.assertEqual(record["dimension"], 3)
+            self.assertEqual(load_embeddings("file1.json"), [1.0, 0.0, 0.0])
+
+            mock_active.return_value = {"generation": None, "model": "new-model", "dimension": 3}
+            self.assertEqual(load_embeddings("file1.json"), [])
+
+    @patch('src.modules.memory_search.get_json_files_in_directory')
+    @patch('src.modules.memory_search.get_embeddings')
+    @patch('src.modules.memory_search.ollama.embeddings')
+    @patch('src.modules.memory_search.read_memory')
+    @patch('src.modules.memory_search.get_active_generation')
+    def test_search_memories_reads_generation_once(self, mock_active, mock_read_memory, mock_ollama_embeddings,
+                                                   mock_get_embeddings, mock_get_json_files):
+        old = {"generation": None, "model": "old-model", "dimension": 3}
+        new = {"generation": "new-model", "model": "new-model", "dimension": 4}
+        mock_active.side_effect = [old, new]
+        mock_get_json_files.return_value = [Path('file1.json'), Path('file2.json')]
+        mock_get_embeddings.side_effect = [[1, 0, 0], [0, 1, 0]]
+        mock_ollama_embeddings.return_value = {"embedding": [1, 1, 0]}
+        mock_read_memory.return_value = {"content": "Memory", "type": "document_chunk"}
+
+        results = search_memories("test query", top_k=2, graph_rerank=False)
+
+        self.assertEqual(len(results), 2)
+        mock_active.assert_called_once()
+        for call in mock_get_embeddings.call_args_list:
+            self.assertIs(call.args[1], old)
+        self.assertEqual(mock_ollama_embeddings.call_args.kwargs["model"], "old-model")
+
+    def test_personalized_pagerank(self):
+        seeds = {"a": 1.0, "b": 1.0, "c": 1.0}
+        neighbourhoods = {
+            "a": [("hub", "RELATED_TO", 1.0)],
+            "b": [("hub", "RELATED_TO", 1.0)],
+            "c": [("leaf", "RELATED_TO", 1.0)]
+        }
+        ranks = personalized_pagerank(seeds, neighbourhoods)
+        self.assertAlmostEqual(sum(ranks.values()), 1.0, places=6)
+        self.assertGreater(ranks["hub"], ranks["leaf"])
+
+    @patch('src.modules.memory_search.get_neighbourhoods')
+    def test_rerank_with_graph(self, mock_get_neighbourhoods):
+        mock_get_neighbourhoods.return_value = {
+            "file1": [],
+            "file2": [("file3", "RELATED_TO", 0.9)],
+            "file3": [("file2", "RELATED_TO", 0.9)]
+        }
+        results = rerank_with_graph([("file1.json", 0.8), ("file2.json", 0.75), ("file3.json", 0.75)])
+        mock_get_neighbourhoods.assert_called_once()
+        self.assertEqual(results[0]['filename'], "file2.json")
+        self.assertEqual(len(results), 3)
+
+    @patch('src.modules.memory_search.get_neighbourhoods')
+    def test_rerank_with_graph_adds_only_memory_neighbours(self, mock_get_neighbourhoods):
+        mock_get_neighbourhoods.return_value = {
+            "file1": [("concept_python", "MENTIONS", 0.95), ("file2", "RELATED_TO", 0.9),
+                      ("file3", "RELATED_TO", 0.2)],
+        }
+        results = rerank_with_graph([("file1.json", 0.8)], {"file1.json", "file2.json", "file3.json"}, 0.5)
+        self.assertEqual([r['filename'] for r in results], ["file1.json", "file2.json"])
+        self.assertEqual(results[1]['source'], "edge")
+
+    @patch('src.modules.memory_search.get_neighbourhoods')
+    def test_rerank_with_graph_falls_back_to_dense_order(self, mock_get_neighbourhoods):
+        mock_get_neighbourhoods.side_effect = Exception("no database")
+        results = rerank_with_graph([("file1.json", 0.8), ("file2.json", 0.7)])
+        self.assertEqual([r['filename'] for r in results], ["file1.json", "file2.json"])
+
+class TestReembedMemories(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.data_dir = Path(tmp.name) / 'data'
+        self.embeddings_dir = Path(tmp.name) / 'embeddings'
+        self.data_dir.mkdir()
+        self.embeddings_dir.mkdir()
+        for i in range(3):
+            (self.data_dir / f"memory{i}.json").write_text(
+                json.dumps({"type": "document_chunk", "content": "word " * (i + 1)}))
+        (self.embeddings_dir / 'CURRENT').write_text(
+            json.dumps({"generation": None, "model": "old-model", "dimension": 3}))
+        for patcher in (
+            patch('src.modules.memory_search.DATA_DIR', self.data_dir),
+            patch('src.modules.memory_search.EMBEDDINGS_DIR', self.embeddings_dir),
+            patch.dict('src.modules.memory_search._active_generation_cache', {"mtime_ns": None, "generation": None}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch('src.modules.memory_search.ollama.embeddings', side_effect=self.embed)
+        self.mock_embeddings = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.stop_after = None
+        self.stop_event = threading.Event()
+
+    def embed(self, model, prompt):
+        if self.mock_embeddings.call_count == self.stop_after:
+            self.stop_event.set()
+        return {"embedding": [float(len(prompt)), 1.0, 0.0, 0.0]}
+
+    def test_reembed_memories_swaps_generation(self):
+        self.assertEqual(get_active_generation()["model"], "old-model")
+        self.assertTrue(reembed_memories("new-model", max_per_second=0))
+
+        self.assertEqual(get_active_generation(), {"generation": "new-model", "model": "new-model", "dimension": 4})
+        self.assertFalse((self.embeddings_dir / 'PENDING').exists())
+        self.assertEqual(self.mock_embeddings.call_count, 3)
+        self.assertEqual(len(load_embeddings("memory0.json")), 4)
+
+    def test_reembed_memories_resumes_after_stop(self):
+        self.stop_after = 2
+        self.assertFalse(reembed_memories("new-model", max_per_second=0, stop_event=self.stop_event))
+        self.assertEqual(get_active_generation()["model"], "old-model")
+        self.assertTrue((self.embeddings_dir / 'PENDING').exists())
+
+        thread, _ = resume_pending_reembedding()
+        thread.join(timeout=5)
+        self.assertEqual(get_active_generation()["model"], "new-model")
+        self.assertEqual(self.mock_embeddings.call_count, 3)
+        self.assertIsNone(resume_pending_reembedding())
+
+    def test_reembed_memories_skips_unreadable_memory(self):
+        (self.data_dir / "memory1.json").write_text("{not json")
+        self.assertTrue(reembed_memories("new-model", max_per_second=0))
+        self.assertEqual(get_active_generation()["model"], "new-model")
+        self.assertEqual(load_embeddings("memory1.json"), [])
+        self.assertEqual(len(load_embeddings("memory2.json")), 4)
+
+    def test_reembed_memories_skips_dimension_mismatch(self):
+        save_embeddings("memory1.json", [1.0, 0.0, 0.0], model="new-model", generation="new-model")
+        self.assertTrue(reembed_memories("new-model", max_per_second=0))
+        self.assertFalse((self.embeddings_dir / 'PENDING').exists())
+        self.assertEqual(get_active_generation()["dimension"], 4)
+        self.assertEqual(load_embeddings("memory1.json"), [])
+        self.assertEqual(len(load_embeddings("memory2.json")), 4)
+
 if __name__ == '__main__':
     unittest.main()